@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'django_celery_beat',
     'resourcemanagement',
     'reporting',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -97,12 +98,90 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'authflow.signed_tokens.SignedTokenAuthentication',
+        'authflow.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    # Client IPs for throttling come from REMOTE_ADDR unless we sit behind this many trusted proxies;
+    # leaving it unset would trust a client-supplied X-Forwarded-For
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+}
+
+# Token -> user lookups are served from a per-process LRU in front of the shared cache.
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TTL = 300
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_CACHE_TTL = 5  # seconds a worker may serve a token invalidated elsewhere
+AUTH_TOKEN_TTL = 7 * 24 * 3600  # tokens expire a week after they were issued or last refreshed
+AUTH_TOKEN_REFRESH_AFTER = 3600  # tokens used after an hour are refreshed (sliding expiry)
+AUTH_TOKEN_SWEEP_CHUNK_SIZE = 1000
+AUTH_TOKEN_SWEEP_MAX_CHUNKS = 100
+
+# Signed "Bearer" access tokens are validated without the database; the login token doubles as the refresh token.
+ACCESS_TOKEN_TTL = 300  # role changes and revocations take effect within this many seconds
+
+# Role -> permission sets are precomputed per role and rebuilt when the mapping version is bumped.
+ROLE_PERMISSION_CACHE_ALIAS = 'default'
+ROLE_PERMISSION_CACHE_TTL = 3600
+ROLE_PERMISSION_VERSION_CHECK_INTERVAL = 1  # seconds
+
+# Login and OTP attempts are limited per email and per client IP before any hashing work.
+AUTH_THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    'login_email': {'limit': 5, 'window': 300, 'lockout': 60},
+    'login_ip': {'limit': 50, 'window': 300, 'lockout': 60},
+    'otp_email': {'limit': 5, 'window': 300, 'lockout': 60},
+    'otp_ip': {'limit': 50, 'window': 300, 'lockout': 60},
+}
+AUTH_THROTTLE_BACKOFF = 2  # each repeated lockout lasts twice as long
+AUTH_THROTTLE_MAX_LOCKOUT = 3600
+
+# Thread pool used by the async login/register endpoints for password hashing.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+USER_IMPORT_CHUNK_SIZE = 1000
+
+# OTPs live in a shared cache so any worker can verify them; entries expire natively.
+OTP_STORE_BACKEND = os.getenv('OTP_STORE_BACKEND', 'authflow.otp.CacheOTPStore')
+OTP_CACHE_ALIAS = 'default'
+OTP_EXPIRY_SECONDS = 180
+OTP_RESEND_COOLDOWN = 60  # resend requests inside this window reuse the pending code without mailing it again
+OTP_MAX_ISSUES_PER_HOUR = 5
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'  # Change based on your email provider
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+
+# Outgoing mail is written to the notifications outbox and delivered by Celery.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_BATCHES = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BACKOFF = 60  # seconds, doubled on every failed attempt
+EMAIL_OUTBOX_DISPATCH_ON_COMMIT = True
+EMAIL_OUTBOX_LEASE = 300  # seconds a claimed message is hidden from other dispatchers while it is sent
+
+# Critical-path analysis per project is cached until one of its tasks changes.
+SCHEDULE_CACHE_ALIAS = 'default'
+SCHEDULE_CACHE_TTL = 24 * 3600
+TASK_BULK_MAX_ITEMS = 5000
+SCHEDULE_STREAM_CHUNK_SIZE = 100  # projects (with their tasks and milestones) held in memory while streaming
+
+# Deadline alerts go out as one digest per assignee and are recorded so each fires once.
+DEADLINE_ALERT_LEAD_DAYS = 1  # tasks due within this many days count as due soon
+DEADLINE_ALERT_CHUNK_SIZE = 500  # alerts read and recorded per transaction
+DEADLINE_ALERT_SHARDS = 8  # assignee id ranges scanned as parallel Celery subtasks
 AUTH_USER_MODEL = 'authflow.CustomUser'
 
 # Password validation
@@ -151,6 +230,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+# Chords (e.g. the sharded deadline alert scan) need a result backend; it gets its own Redis DB
+# so clearing or evicting the cache never drops in-flight chord state
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/2')
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-tokens': {
+        'task': 'authflow.tasks.purge_expired_tokens',
+        'schedule': 3600.0,
+    },
+    'dispatch-email-outbox': {
+        'task': 'notifications.tasks.dispatch_email_outbox',
+        'schedule': 30.0,
+    },
+    'send-deadline-alerts': {
+        'task': 'projectmanagement.tasks.send_deadline_alerts',
+        'schedule': 3600.0,
+    },
+}
+# Beat keeps the schedule in django_celery_beat's PeriodicTask table, seeded from the entries above
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
 JAZZMIN_SETTINGS = {
     "site_title": "Project Management Admin",
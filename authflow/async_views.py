@@ -0,0 +1,149 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import transaction
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import serializers, status
+from rest_framework.throttling import BaseThrottle
+
+from .authentication import issue_token
+from .models import CustomUser
+from .otp import OTP_LIMITED, send_activation_otp
+from .serializers import LoginSerializer, RegisterSerializer, save_new_user
+from .views import login_payload
+from .throttling import SlidingWindowLimiter, reset_auth_attempts
+
+# Password hashing is CPU bound; PBKDF2 releases the GIL, so a bounded pool
+# lets one ASGI process hash several passwords at once without blocking the
+# event loop.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+)
+
+
+async def run_hasher(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+
+
+def verify_password(password, encoded):
+    """
+    Return ``(valid, needs_rehash)`` for ``password`` against ``encoded``.
+    Pure hashing with no database access, so it is safe to run on the hash
+    pool; the caller saves any upgraded hash.
+    """
+    outdated = []
+    valid = check_password(password, encoded, setter=outdated.append)
+    return valid, bool(outdated)
+
+
+def save_password_hash(user, password_hash):
+    user.password = password_hash
+    user.save(update_fields=['password'])
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def client_ident(request):
+    return BaseThrottle().get_ident(request)
+
+
+@sync_to_async
+def throttle_wait(scope, request, email):
+    wait = SlidingWindowLimiter.for_scope(f'{scope}_ip').hit(client_ident(request))
+    if not wait and isinstance(email, str) and email:
+        wait = SlidingWindowLimiter.for_scope(f'{scope}_email').hit(email.strip().lower())
+    return wait
+
+
+def throttled_response(wait):
+    response = JsonResponse({'detail': 'Request was throttled.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(int(wait) + 1)
+    return response
+
+
+class AsyncAuthView(View):
+    """
+    Base for the ASGI-native auth endpoints. Like DRF's APIView these are
+    CSRF exempt JSON endpoints; every handler must be ``async``.
+    """
+    http_method_names = ['post']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+
+class AsyncLoginView(AsyncAuthView):
+    async def post(self, request):
+        data = parse_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid JSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        wait = await throttle_wait('login', request, data.get('email'))
+        if wait:
+            return throttled_response(wait)
+
+        serializer = LoginSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+
+        user = await CustomUser.objects.filter(email=email).afirst()
+        valid, needs_rehash = await run_hasher(verify_password, password, user.password) if user else (False, False)
+        if valid:
+            if needs_rehash:
+                # Like AbstractBaseUser.check_password, but the save goes through sync_to_async
+                password_hash = await run_hasher(make_password, password)
+                await sync_to_async(save_password_hash)(user, password_hash)
+            await sync_to_async(reset_auth_attempts)('login', email)
+            if user.is_active:
+                token = await sync_to_async(issue_token)(user)
+                return JsonResponse(login_payload(user, token), status=status.HTTP_200_OK)
+            if await sync_to_async(send_activation_otp)(email) == OTP_LIMITED:
+                return JsonResponse(
+                    {'error': 'User not active. Too many OTP requests, try again later.'},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+            return JsonResponse({'error': 'User not active. OTP sent to email.'}, status=status.HTTP_403_FORBIDDEN)
+        return JsonResponse({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncRegisterView(AsyncAuthView):
+    async def post(self, request):
+        data = parse_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid JSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RegisterSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = dict(serializer.validated_data)
+        password_hash = await run_hasher(make_password, validated_data.pop('password'))
+        try:
+            await sync_to_async(create_inactive_user)(validated_data, password_hash)
+        except serializers.ValidationError as e:
+            return JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse({'message': 'User registered. OTP sent to email.'}, status=status.HTTP_201_CREATED)
+
+
+def create_inactive_user(validated_data, password_hash):
+    with transaction.atomic():
+        user = CustomUser(password=password_hash, is_active=False, **validated_data)
+        save_new_user(user, validated_data)
+        send_activation_otp(user.email)
+    return user
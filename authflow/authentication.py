@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils.timezone import now, timedelta
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with a per-entry TTL. Used as the in-process layer
+    in front of the shared Django cache.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            deadline, value = item
+            if deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class AuthCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def incr(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self):
+        return {'local_hits': self.local_hits, 'shared_hits': self.shared_hits, 'misses': self.misses}
+
+
+auth_cache_stats = AuthCacheStats()
+_local_tokens = LRUCache(settings.AUTH_TOKEN_LOCAL_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_CACHE_TTL)
+
+
+# Cache entries hold only these user fields and the token's creation time, never a pickled user
+USER_FIELDS = ('id', 'role_id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _token_cache_key(key):
+    return f'authtoken:v2:{key}'
+
+
+def _shared_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def invalidate_token(key):
+    _local_tokens.delete(key)
+    _shared_cache().delete(_token_cache_key(key))
+
+
+def invalidate_user_tokens(user_ids):
+    """
+    Drop cached tokens of the given user(s). Called on logout, password
+    reset, deactivation and role changes.
+    """
+    if not isinstance(user_ids, (list, tuple, set, frozenset)):
+        user_ids = [user_ids]
+    keys = list(Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True))
+    for key in keys:
+        _local_tokens.delete(key)
+    if keys:
+        _shared_cache().delete_many([_token_cache_key(key) for key in keys])
+
+
+def token_expired(token, current=None):
+    return token.created <= (current or now()) - timedelta(seconds=settings.AUTH_TOKEN_TTL)
+
+
+def issue_token(user):
+    """Return the user's live token, replacing it if it has expired."""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that resolves token -> user (role id included)
+    from an in-process LRU, then the shared cache, and only hits the
+    Token+User join on a miss.
+
+    The caches hold ``USER_FIELDS`` and the token's creation time. The
+    returned user is rebuilt from them with every other field deferred, so
+    profile fields (and the password hash) are loaded from the database
+    only if request code reads them.
+
+    Tokens expire AUTH_TOKEN_TTL seconds after they were issued or last
+    refreshed; a token older than AUTH_TOKEN_REFRESH_AFTER is refreshed on
+    use, so active sessions slide forward.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = _local_tokens.get(key)
+        if entry is not None:
+            auth_cache_stats.incr('local_hits')
+        else:
+            entry = _shared_cache().get(_token_cache_key(key))
+            if entry is not None:
+                auth_cache_stats.incr('shared_hits')
+                _local_tokens.set(key, entry)
+            else:
+                auth_cache_stats.incr('misses')
+                entry = self.load_entry(key)
+                if entry is not None:
+                    _shared_cache().set(_token_cache_key(key), entry, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+                    _local_tokens.set(key, entry)
+
+        if entry is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        user_values, created = entry
+        user = self.build_user(user_values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        current = now()
+        token = Token(key=key, user=user, created=created)
+        token._state.adding = False
+        if token_expired(token, current):
+            invalidate_token(key)
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if created <= current - timedelta(seconds=settings.AUTH_TOKEN_REFRESH_AFTER):
+            token.created = self.refresh(key, user_values, current)
+        return user, token
+
+    def build_user(self, values):
+        # Fresh instance per request, so request code can't mutate what the caches hold
+        model = Token.user.field.related_model
+        values = dict(zip(USER_FIELDS, values))
+        # from_db wants the loaded fields in model order
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+        return model.from_db(router.db_for_read(model), names, [values[name] for name in names])
+
+    def refresh(self, key, user_values, current):
+        Token.objects.filter(key=key).update(created=current)
+        entry = (user_values, current)
+        _shared_cache().set(_token_cache_key(key), entry, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+        _local_tokens.set(key, entry)
+        return current
+
+    def load_entry(self, key):
+        row = (
+            Token.objects.filter(key=key)
+            .values_list('created', *(f'user__{field}' for field in USER_FIELDS))
+            .first()
+        )
+        if row is None:
+            return None
+        return tuple(row[1:]), row[0]
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import CustomUser, Role
+
+UNIQUE_FIELDS = ('username', 'email', 'phone_number')
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    phone_number = serializers.CharField(max_length=15)
+    password = serializers.CharField()
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    role = serializers.CharField(required=False, allow_blank=True, default='')
+    is_active = serializers.BooleanField(required=False, default=False)
+
+
+def iter_rows(fileobj, file_format):
+    """Stream rows from a CSV or NDJSON file without reading it into memory."""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig')
+    if file_format == 'csv':
+        for row in csv.DictReader(fileobj):
+            # Empty cells count as missing so optional columns fall back to defaults
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+    elif file_format == 'ndjson':
+        for line in fileobj:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def _init_hash_worker():
+    # Needed when the pool spawns rather than forks its workers
+    django.setup()
+
+
+class UserImporter:
+    """
+    Imports users chunk by chunk: rows are validated set-wise against one
+    uniqueness query per chunk, passwords are hashed across a worker pool
+    and rows are written with ``bulk_create``. ``run`` yields one result per
+    input row (created, duplicate or invalid).
+
+    Each chunk is written before the next is read, so the uniqueness query
+    also catches repeats of earlier chunks and memory stays bounded by
+    ``chunk_size`` whatever the file size. Hashing uses threads unless
+    ``processes`` is set; only the ``import_users`` command does that, as
+    forking a web server worker per upload is not safe.
+    """
+
+    def __init__(self, chunk_size=None, hash_workers=None, processes=False):
+        self.chunk_size = chunk_size or settings.USER_IMPORT_CHUNK_SIZE
+        self.hash_workers = settings.PASSWORD_HASH_WORKERS if hash_workers is None else hash_workers
+        self.processes = processes
+        self.roles = None
+
+    def make_executor(self):
+        if self.hash_workers <= 1:
+            return None
+        if self.processes:
+            return ProcessPoolExecutor(max_workers=self.hash_workers, initializer=_init_hash_worker)
+        # PBKDF2 releases the GIL, so threads still hash in parallel
+        return ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix='import-hash')
+
+    def run(self, rows):
+        executor = self.make_executor()
+        try:
+            self.roles = dict(Role.objects.values_list('name', 'id'))
+            rows = iter(enumerate(rows, start=1))
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                yield from self.import_chunk(chunk, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def import_chunk(self, chunk, executor):
+        results = {}
+        valid = []
+        for row_number, row in chunk:
+            serializer = UserImportRowSerializer(data=row if isinstance(row, dict) else {})
+            if row is None or not serializer.is_valid():
+                errors = serializer.errors if row is not None else {'row': ['Malformed row.']}
+                results[row_number] = {'row': row_number, 'status': 'invalid', 'errors': errors}
+                continue
+            data = serializer.validated_data
+            if data['role'] and data['role'] not in self.roles:
+                results[row_number] = {'row': row_number, 'status': 'invalid', 'errors': {'role': ['Unknown role.']}}
+                continue
+            valid.append((row_number, data))
+
+        taken = self.existing_values(valid)
+        seen = {field: set() for field in UNIQUE_FIELDS}
+        to_create = []
+        for row_number, data in valid:
+            clashes = [f for f in UNIQUE_FIELDS if data[f] in taken[f] or data[f] in seen[f]]
+            if clashes:
+                results[row_number] = {'row': row_number, 'status': 'duplicate', 'fields': clashes}
+                continue
+            for field in UNIQUE_FIELDS:
+                seen[field].add(data[field])
+            to_create.append((row_number, data))
+
+        passwords = [data['password'] for _, data in to_create]
+        if executor is not None:
+            hashes = list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (self.hash_workers * 4))))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        users = [
+            CustomUser(
+                username=data['username'],
+                email=data['email'],
+                phone_number=data['phone_number'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                role_id=self.roles.get(data['role']),
+                is_active=data['is_active'],
+                password=password_hash,
+            )
+            for (_, data), password_hash in zip(to_create, hashes)
+        ]
+        for (row_number, _), status in zip(to_create, self.insert(users)):
+            results[row_number] = {'row': row_number, 'status': status}
+
+        for row_number, _ in chunk:
+            yield results[row_number]
+
+    def existing_values(self, valid):
+        taken = {field: set() for field in UNIQUE_FIELDS}
+        if not valid:
+            return taken
+        lookup = Q()
+        for field in UNIQUE_FIELDS:
+            lookup |= Q(**{f'{field}__in': [data[field] for _, data in valid]})
+        for row in CustomUser.objects.filter(lookup).values_list(*UNIQUE_FIELDS):
+            for field, value in zip(UNIQUE_FIELDS, row):
+                taken[field].add(value)
+        return taken
+
+    def insert(self, users):
+        try:
+            with transaction.atomic():
+                CustomUser.objects.bulk_create(users)
+            return ['created'] * len(users)
+        except IntegrityError:
+            # A concurrent writer took some of the values; fall back to row by row
+            statuses = []
+            for user in users:
+                try:
+                    with transaction.atomic():
+                        user.save()
+                    statuses.append('created')
+                except IntegrityError:
+                    statuses.append('duplicate')
+            return statuses
@@ -0,0 +1,48 @@
+import time
+from django.core.cache import caches
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from authflow.models import CustomUser
+from authflow.views import LoginView
+
+
+# The limiter gets a private in-memory cache so the benchmark never clears the shared one
+BENCHMARK_CACHE_ALIAS = 'benchmark-throttle'
+
+
+class Command(BaseCommand):
+    help = "Replay a credential-stuffing burst against LoginView with and without throttling and report CPU time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200)
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        factory = APIRequestFactory()
+        payload = {'email': 'victim@example.com', 'password': 'not-the-password'}
+
+        private_cache = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': BENCHMARK_CACHE_ALIAS}
+        with override_settings(
+            CACHES={**settings.CACHES, BENCHMARK_CACHE_ALIAS: private_cache},
+            AUTH_THROTTLE_CACHE_ALIAS=BENCHMARK_CACHE_ALIAS,
+        ), transaction.atomic():
+            CustomUser.objects.create_user(
+                username='benchmark-victim', email=payload['email'],
+                password='correct-horse-battery', phone_number='benchmark', is_active=True,
+            )
+            for label, view in (
+                ('unthrottled', LoginView.as_view(throttle_classes=[])),
+                ('throttled', LoginView.as_view()),
+            ):
+                caches[BENCHMARK_CACHE_ALIAS].clear()
+                statuses = {}
+                start = time.process_time()
+                for _ in range(attempts):
+                    response = view(factory.post('/api/auth/login/', payload, format='json'))
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                elapsed = time.process_time() - start
+                self.stdout.write(f"{label}: {elapsed:.2f}s CPU for {attempts} attempts, responses {statuses}")
+            transaction.set_rollback(True)
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authflow.models import CustomUser, Role, Permission, RolePermission
+from authflow.permissions import user_has_permissions
+
+
+class Command(BaseCommand):
+    help = "Compare the per-request permission join with the precomputed role permission sets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=2000)
+        parser.add_argument('--permissions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        # Everything is created inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            role = Role.objects.create(name='benchmark-role')
+            permissions = Permission.objects.bulk_create(
+                Permission(name=f'benchmark-perm-{i}') for i in range(options['permissions'])
+            )
+            RolePermission.objects.bulk_create(RolePermission(role=role, permission=p) for p in permissions)
+            user = CustomUser.objects.create_user(
+                username='benchmark-user', email='benchmark@example.com',
+                phone_number='benchmark', role=role, is_active=True,
+            )
+            name = permissions[-1].name
+
+            start = time.perf_counter()
+            for _ in range(checks):
+                Permission.objects.filter(roles__role__customuser=user, name=name).exists()
+            join_elapsed = time.perf_counter() - start
+
+            user_has_permissions(user, [name])  # warm the cache
+            start = time.perf_counter()
+            for _ in range(checks):
+                user_has_permissions(user, [name])
+            cached_elapsed = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"per-request join: {join_elapsed / checks * 1e6:.1f} us/check")
+        self.stdout.write(f"precomputed set:  {cached_elapsed / checks * 1e6:.1f} us/check")
+        self.stdout.write(f"speedup: {join_elapsed / cached_elapsed:.0f}x")
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from authflow.bulk_import import UserImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import users from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None)
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes')
+        parser.add_argument('--verbose-results', action='store_true', help='Print a line for every row')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        importer = UserImporter(chunk_size=options['chunk_size'], hash_workers=options['workers'], processes=True)
+        summary = {'created': 0, 'duplicate': 0, 'invalid': 0}
+
+        start = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                for result in importer.run(iter_rows(f, file_format)):
+                    summary[result['status']] += 1
+                    if options['verbose_results'] or result['status'] == 'invalid':
+                        self.stdout.write(str(result))
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        total = sum(summary.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{summary['created']} created, {summary['duplicate']} duplicate, {summary['invalid']} invalid"
+        ))
@@ -0,0 +1,79 @@
+import asyncio
+import statistics
+import time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from authflow.models import CustomUser
+
+UNTHROTTLED = {
+    scope: {'limit': 10 ** 9, 'window': 60, 'lockout': 1}
+    for scope in ('login_email', 'login_ip', 'otp_email', 'otp_ip')
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the sync login endpoint (one WSGI worker, one request at a time) "
+        "against the async endpoint (one ASGI process, many requests in flight)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=64)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        password = 'loadtest-password'
+        password_hash = make_password(password)
+        users = CustomUser.objects.bulk_create(
+            CustomUser(
+                username=f'loadtest-{i}', email=f'loadtest-{i}@example.com',
+                phone_number=f'lt-{i}', password=password_hash, is_active=True,
+            )
+            for i in range(total)
+        )
+        payloads = [{'email': user.email, 'password': password} for user in users]
+        try:
+            with override_settings(AUTH_THROTTLE_RATES=UNTHROTTLED, ALLOWED_HOSTS=['testserver']):
+                self.report('sync', *self.run_sync(payloads))
+                self.report('async', *asyncio.run(self.run_async(payloads, options['concurrency'])))
+        finally:
+            CustomUser.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run_sync(self, payloads):
+        client = Client()
+        latencies = []
+        start = time.perf_counter()
+        for payload in payloads:
+            t = time.perf_counter()
+            response = client.post('/api/auth/login/', payload, content_type='application/json')
+            latencies.append(time.perf_counter() - t)
+            if response.status_code != 200:
+                raise CommandError(f"sync login failed with {response.status_code}")
+        return time.perf_counter() - start, latencies
+
+    async def run_async(self, payloads, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def login(payload):
+            async with semaphore:
+                t = time.perf_counter()
+                response = await client.post('/api/auth/async/login/', payload, content_type='application/json')
+                latencies.append(time.perf_counter() - t)
+                if response.status_code != 200:
+                    raise CommandError(f"async login failed with {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login(payload) for payload in payloads))
+        return time.perf_counter() - start, latencies
+
+    def report(self, mode, elapsed, latencies):
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{mode}: {len(latencies) / elapsed:.1f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms"
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # rest_framework.authtoken.Token.created is not indexed; the expired token
+    # sweeper range-scans it.
+
+    dependencies = [
+        ('authtoken', '0003_tokenproxy'),
+        ('authflow', '0004_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX authtoken_token_created_idx ON authtoken_token (created);',
+            reverse_sql='DROP INDEX authtoken_token_created_idx;',
+        ),
+    ]
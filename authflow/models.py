@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, username, email, password=None, **extra_fields):
@@ -50,6 +52,8 @@ class RolePermission(models.Model):
     def __str__(self):
         return f"{self.role.name} - {self.permission.name}"
 
+DIRECTORY_SEARCH_FIELDS = ['username', 'email', 'first_name', 'last_name', 'phone_number']
+
 class CustomUser(AbstractUser):
     username = models.CharField(max_length=150, unique=True)  # Add username field
     email = models.EmailField(unique=True)  # Use email as the unique identifier
@@ -60,4 +64,14 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = 'username'  # Set username as the unique identifier
     REQUIRED_FIELDS = ['email', 'first_name', 'last_name', 'phone_number']  # Fields required for superuser creation
 
-    objects = CustomUserManager()  # Use the custom manager
\ No newline at end of file
+    objects = CustomUserManager()  # Use the custom manager
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Trigram indexes back case-insensitive substring search in the user directory
+            # (Django renders icontains as UPPER(col) LIKE UPPER(...)). Postgres only.
+            GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'user_{field}_trgm')
+            for field in DIRECTORY_SEARCH_FIELDS
+        ] + [
+            models.Index(fields=['is_active', 'role'], name='user_active_role_idx'),
+        ]
\ No newline at end of file
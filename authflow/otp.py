@@ -0,0 +1,189 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from django.utils.timezone import now, timedelta
+
+from notifications.outbox import queue_mail
+
+OTP_SENT = 'sent'
+OTP_REUSED = 'reused'
+OTP_LIMITED = 'limited'
+
+ISSUE_WINDOW = 3600
+
+
+class BaseOTPStore:
+    """
+    Keeps one pending OTP per email. Entries expire on their own, so an OTP
+    issued by one worker can be verified by any other and abandoned entries
+    never pile up.
+    """
+
+    def set(self, email, otp, ttl=None):
+        raise NotImplementedError
+
+    def get(self, email):
+        raise NotImplementedError
+
+    def delete(self, email):
+        raise NotImplementedError
+
+    def start_cooldown(self, email, seconds):
+        """Atomically start a resend cooldown; False if one is already running."""
+        raise NotImplementedError
+
+    def count_issue(self, email):
+        """Record one issuance and return how many happened in the current hour."""
+        raise NotImplementedError
+
+    def get_ttl(self, ttl):
+        return ttl if ttl is not None else settings.OTP_EXPIRY_SECONDS
+
+    def make_entry(self, otp, ttl):
+        return {'otp': otp, 'expires_at': now() + timedelta(seconds=ttl)}
+
+
+class CacheOTPStore(BaseOTPStore):
+    """
+    Stores OTPs in a Django cache (Redis in production) with the cache's
+    native timeout, so every worker sees the same entries.
+    """
+    key_prefix = 'otp'
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.OTP_CACHE_ALIAS]
+
+    def make_key(self, email):
+        return f'{self.key_prefix}:{email}'
+
+    def set(self, email, otp, ttl=None):
+        ttl = self.get_ttl(ttl)
+        self.cache.set(self.make_key(email), self.make_entry(otp, ttl), timeout=ttl)
+
+    def get(self, email):
+        return self.cache.get(self.make_key(email))
+
+    def delete(self, email):
+        self.cache.delete(self.make_key(email))
+
+    def start_cooldown(self, email, seconds):
+        return self.cache.add(f'{self.make_key(email)}:cooldown', 1, timeout=seconds)
+
+    def count_issue(self, email):
+        key = f'{self.make_key(email)}:issued'
+        if self.cache.add(key, 1, timeout=ISSUE_WINDOW):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Window expired between add and incr
+            self.cache.set(key, 1, timeout=ISSUE_WINDOW)
+            return 1
+
+
+class LocMemOTPStore(BaseOTPStore):
+    """
+    Process-local store for tests and single-process development. Expired
+    entries are purged on every write so memory stays bounded.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._cooldowns = {}
+        self._issues = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, current):
+        for items in (self._entries, self._cooldowns, self._issues):
+            for email in [e for e, (deadline, _) in items.items() if deadline <= current]:
+                del items[email]
+
+    def set(self, email, otp, ttl=None):
+        ttl = self.get_ttl(ttl)
+        current = time.monotonic()
+        with self._lock:
+            self._purge(current)
+            self._entries[email] = (current + ttl, self.make_entry(otp, ttl))
+
+    def get(self, email):
+        with self._lock:
+            item = self._entries.get(email)
+            if item is None:
+                return None
+            deadline, entry = item
+            if deadline <= time.monotonic():
+                del self._entries[email]
+                return None
+            return entry
+
+    def delete(self, email):
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def start_cooldown(self, email, seconds):
+        current = time.monotonic()
+        with self._lock:
+            self._purge(current)
+            if email in self._cooldowns:
+                return False
+            self._cooldowns[email] = (current + seconds, None)
+            return True
+
+    def count_issue(self, email):
+        current = time.monotonic()
+        with self._lock:
+            self._purge(current)
+            deadline, count = self._issues.get(email, (current + ISSUE_WINDOW, 0))
+            self._issues[email] = (deadline, count + 1)
+            return count + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cooldowns.clear()
+            self._issues.clear()
+
+
+_otp_store = None
+
+
+def get_otp_store():
+    global _otp_store
+    if _otp_store is None:
+        _otp_store = import_string(settings.OTP_STORE_BACKEND)()
+    return _otp_store
+
+
+@receiver(setting_changed)
+def reset_otp_store(setting, **kwargs):
+    global _otp_store
+    if setting in ('OTP_STORE_BACKEND', 'OTP_CACHE_ALIAS', 'CACHES'):
+        _otp_store = None
+
+
+def issue_otp(email, subject='Your OTP Code', message='Your OTP is {otp}'):
+    """
+    Issue an OTP for ``email`` and queue it by mail, coalescing resends: inside
+    OTP_RESEND_COOLDOWN the pending code is kept and no mail goes out, and at
+    most OTP_MAX_ISSUES_PER_HOUR codes are mailed per email. Returns
+    OTP_SENT, OTP_REUSED or OTP_LIMITED.
+    """
+    store = get_otp_store()
+    if not store.start_cooldown(email, settings.OTP_RESEND_COOLDOWN) and store.get(email):
+        return OTP_REUSED
+    if store.count_issue(email) > settings.OTP_MAX_ISSUES_PER_HOUR:
+        return OTP_LIMITED
+    otp = str(random.randint(100000, 999999))
+    store.set(email, otp)
+    queue_mail(subject, message.format(otp=otp), 'noreply@example.com', [email])
+    return OTP_SENT
+
+
+def send_activation_otp(email):
+    return issue_otp(email)
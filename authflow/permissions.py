@@ -0,0 +1,120 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import BasePermission
+
+from .models import Permission
+
+VERSION_KEY = 'rolepermissions:version'
+
+_local = {'version': None, 'checked_at': None, 'roles': {}}
+_lock = threading.Lock()
+_batch = threading.local()
+
+
+def _shared_cache():
+    return caches[settings.ROLE_PERMISSION_CACHE_ALIAS]
+
+
+def _role_key(version, role_id):
+    return f'rolepermissions:{version}:{role_id}'
+
+
+def get_permission_version():
+    """
+    Current version of the role -> permission mapping. Re-read from the
+    shared cache at most every ROLE_PERMISSION_VERSION_CHECK_INTERVAL
+    seconds; a change of version drops every locally built set.
+    """
+    current = time.monotonic()
+    checked_at = _local['checked_at']
+    if checked_at is not None and current - checked_at < settings.ROLE_PERMISSION_VERSION_CHECK_INTERVAL:
+        return _local['version']
+    version = _shared_cache().get_or_set(VERSION_KEY, 1, timeout=None)
+    with _lock:
+        if version != _local['version']:
+            _local['roles'] = {}
+            _local['version'] = version
+        _local['checked_at'] = current
+    return version
+
+
+def bump_permission_version():
+    cache = _shared_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+    with _lock:
+        _local['checked_at'] = None
+
+
+@contextmanager
+def batched_permission_changes():
+    """
+    Suppress the per-row version bumps from signals while a bulk change is
+    applied; the caller bumps the version once when it commits.
+    """
+    _batch.depth = getattr(_batch, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _batch.depth -= 1
+
+
+def in_permission_batch():
+    return getattr(_batch, 'depth', 0) > 0
+
+
+def clear_local_permissions():
+    with _lock:
+        _local.update(version=None, checked_at=None, roles={})
+
+
+def get_role_permissions(role_id):
+    """Frozenset of permission names granted to a role, built lazily once per version."""
+    if role_id is None:
+        return frozenset()
+    version = get_permission_version()
+    permissions = _local['roles'].get(role_id)
+    if permissions is not None:
+        return permissions
+
+    key = _role_key(version, role_id)
+    permissions = _shared_cache().get(key)
+    if permissions is None:
+        permissions = frozenset(
+            Permission.objects.filter(roles__role_id=role_id).values_list('name', flat=True)
+        )
+        _shared_cache().set(key, permissions, timeout=settings.ROLE_PERMISSION_CACHE_TTL)
+    with _lock:
+        if _local['version'] == version:
+            _local['roles'][role_id] = permissions
+    return permissions
+
+
+def user_has_permissions(user, names):
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return get_role_permissions(user.role_id).issuperset(names)
+
+
+class HasRolePermission(BasePermission):
+    """
+    Grants access when the user's role holds every permission listed on the
+    view, either as ``required_permissions = ['name', ...]`` or as a dict
+    keyed by HTTP method.
+    """
+
+    def has_permission(self, request, view):
+        required = getattr(view, 'required_permissions', ())
+        if isinstance(required, dict):
+            required = required.get(request.method, ())
+        if not required:
+            return bool(request.user and request.user.is_authenticated)
+        return user_has_permissions(request.user, required)
@@ -0,0 +1,56 @@
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+
+from .authentication import invalidate_user_tokens
+from .models import CustomUser, Role
+
+
+def assign_roles(assignments):
+    """
+    Apply many ``user id -> role id`` pairs (role ``None`` clears it) with one
+    UPDATE per target role inside a single transaction. Returns a result per
+    pair: ``updated``, ``not_found`` or ``invalid_role``.
+    """
+    role_ids = {role_id for _, role_id in assignments if role_id is not None}
+    valid_roles = set(Role.objects.filter(id__in=role_ids).values_list('id', flat=True))
+    user_ids = {user_id for user_id, _ in assignments}
+
+    results = []
+    by_role = defaultdict(set)
+    with transaction.atomic():
+        existing = set(
+            CustomUser.objects.select_for_update().filter(id__in=user_ids).values_list('id', flat=True)
+        )
+        for user_id, role_id in assignments:
+            if user_id not in existing:
+                results.append({'id': user_id, 'status': 'not_found'})
+            elif role_id is not None and role_id not in valid_roles:
+                results.append({'id': user_id, 'status': 'invalid_role'})
+            else:
+                # A later pair for the same user wins, like applying them in order
+                for ids in by_role.values():
+                    ids.discard(user_id)
+                by_role[role_id].add(user_id)
+                results.append({'id': user_id, 'status': 'updated'})
+
+        updated = set()
+        for role_id, ids in by_role.items():
+            if ids:
+                CustomUser.objects.filter(id__in=ids).update(role_id=role_id)
+                updated |= ids
+        if updated:
+            transaction.on_commit(partial(invalidate_user_tokens, updated))
+    return results
+
+
+def assign_role_by_filter(filters, role_id):
+    """Move every user matching ``filters`` to ``role_id`` with one UPDATE. Returns the affected ids."""
+    with transaction.atomic():
+        users = CustomUser.objects.select_for_update().filter(**filters)
+        ids = list(users.values_list('id', flat=True))
+        if ids:
+            CustomUser.objects.filter(id__in=ids).update(role_id=role_id)
+            transaction.on_commit(partial(invalidate_user_tokens, ids))
+    return ids
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Role, RolePermission
+from .permissions import batched_permission_changes, bump_permission_version
+
+
+def sync_role_permissions(matrix):
+    """
+    Make each role's permissions exactly the given set. ``matrix`` maps role
+    id -> set of permission ids. The diff against the current rows is
+    applied with one ``bulk_create`` and one filtered delete in a single
+    transaction, and the permission cache version is bumped once.
+    """
+    with transaction.atomic(), batched_permission_changes():
+        # Lock the roles so concurrent syncs of the same role apply one after the other
+        list(Role.objects.select_for_update().filter(id__in=matrix).values_list('id', flat=True))
+        current = {role_id: set() for role_id in matrix}
+        for role_id, permission_id in RolePermission.objects.filter(
+            role_id__in=matrix
+        ).values_list('role_id', 'permission_id'):
+            current[role_id].add(permission_id)
+
+        added = {role_id: sorted(matrix[role_id] - current[role_id]) for role_id in matrix}
+        removed = {role_id: sorted(current[role_id] - matrix[role_id]) for role_id in matrix}
+
+        to_create = [
+            RolePermission(role_id=role_id, permission_id=permission_id)
+            for role_id, permission_ids in added.items()
+            for permission_id in permission_ids
+        ]
+        if to_create:
+            RolePermission.objects.bulk_create(to_create, ignore_conflicts=True)
+
+        stale = Q()
+        for role_id, permission_ids in removed.items():
+            if permission_ids:
+                stale |= Q(role_id=role_id, permission_id__in=permission_ids)
+        if stale:
+            RolePermission.objects.filter(stale).delete()
+
+        if to_create or stale:
+            transaction.on_commit(bump_permission_version)
+
+    return [
+        {'role': role_id, 'added': added[role_id], 'removed': removed[role_id]}
+        for role_id in matrix
+    ]
@@ -1,26 +1,60 @@
+from collections.abc import Mapping
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from .models import CustomUser,Role, Permission,RolePermission
 
 class RegisterSerializer(serializers.ModelSerializer):
+    UNIQUE_FIELD_MESSAGES = {
+        'username': "A user with this username already exists.",
+        'email': "A user with this email already exists.",
+        'phone_number': "A user with this phone number already exists.",
+    }
+
     class Meta:
         model = CustomUser
         fields = ['username','first_name', 'last_name', 'email', 'password', 'phone_number']
-        extra_kwargs = {'password': {'write_only': True}}
+        # Uniqueness is checked for all three fields at once in to_internal_value()
+        extra_kwargs = {
+            'password': {'write_only': True},
+            'username': {'validators': []},
+            'email': {'validators': []},
+            'phone_number': {'validators': []},
+        }
 
-    def validate_username(self, value):
-        if CustomUser.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-    
-    def validate_email(self, value):
-        if CustomUser.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+    @classmethod
+    def conflict_errors(cls, attrs):
+        """Per-field errors for every unique value already taken, found in one query."""
+        lookup = Q()
+        for field in cls.UNIQUE_FIELD_MESSAGES:
+            if attrs.get(field):
+                lookup |= Q(**{field: attrs[field]})
+        if not lookup:
+            return {}
+        errors = {}
+        for row in CustomUser.objects.filter(lookup).values(*cls.UNIQUE_FIELD_MESSAGES):
+            for field, message in cls.UNIQUE_FIELD_MESSAGES.items():
+                if attrs.get(field) and row[field] == attrs[field]:
+                    errors[field] = [message]
+        return errors
 
-    def validate_phone_number(self, value):
-        if CustomUser.objects.filter(phone_number=value).exists():
-            raise serializers.ValidationError("A user with this phone number already exists.")
-        return value
+    def to_internal_value(self, data):
+        # Report conflicts together with the other field errors, as per-field validators would
+        try:
+            attrs = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            if not isinstance(data, Mapping):
+                raise
+            candidates = {
+                field: data.get(field).strip() for field in self.UNIQUE_FIELD_MESSAGES
+                if field not in exc.detail and isinstance(data.get(field), str)
+            }
+            raise serializers.ValidationError({**exc.detail, **self.conflict_errors(candidates)})
+        errors = self.conflict_errors(attrs)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
 
     def create(self, validated_data):
         user = CustomUser(
@@ -32,13 +66,31 @@ class RegisterSerializer(serializers.ModelSerializer):
             is_active=False  # Default to inactive until OTP verification
         )
         user.set_password(validated_data['password'])  # Hash the password
-        user.save()
+        save_new_user(user, validated_data)
         return user
 
+
+def save_new_user(user, validated_data):
+    """
+    Insert a new user, mapping a unique constraint violation from a
+    concurrent sign-up to the same per-field errors validation reports.
+    """
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError:
+        errors = RegisterSerializer.conflict_errors(validated_data)
+        if not errors:
+            raise
+        raise serializers.ValidationError(errors)
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
 class OTPVerificationSerializer(serializers.Serializer):
     email = serializers.EmailField()
     otp = serializers.CharField()
@@ -81,6 +133,74 @@ class UserManagementSerializer(serializers.ModelSerializer):
         user.save()  # Save the user with the role
         return user
     
+class UserDirectorySerializer(serializers.ModelSerializer):
+    role_name = serializers.CharField(source='role.name', read_only=True, default=None)
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'role', 'role_name', 'is_active']
+
+class RoleAssignmentSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    role = serializers.IntegerField(allow_null=True)
+
+class UserFilterSerializer(serializers.Serializer):
+    role = serializers.IntegerField(required=False, allow_null=True)
+    is_active = serializers.BooleanField(required=False)
+
+class BulkRoleAssignmentSerializer(serializers.Serializer):
+    assignments = RoleAssignmentSerializer(many=True, required=False)
+    filter = UserFilterSerializer(required=False)
+    role = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if ('assignments' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either 'assignments' or 'filter' with a target 'role'.")
+        if 'filter' in attrs:
+            if not attrs['filter']:
+                raise serializers.ValidationError({'filter': "At least one filter is required."})
+            if 'role' not in attrs:
+                raise serializers.ValidationError({'role': "A target role is required with 'filter'."})
+            if attrs['role'] is not None and not Role.objects.filter(id=attrs['role']).exists():
+                raise serializers.ValidationError({'role': "Role not found."})
+        return attrs
+
+class RolePermissionSetSerializer(serializers.Serializer):
+    role = serializers.IntegerField()
+    permissions = serializers.ListField(child=serializers.IntegerField(), allow_empty=True)
+
+class RolePermissionSyncSerializer(serializers.Serializer):
+    role = serializers.IntegerField(required=False)
+    permissions = serializers.ListField(child=serializers.IntegerField(), allow_empty=True, required=False)
+    matrix = RolePermissionSetSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if 'matrix' in attrs:
+            if 'role' in attrs or 'permissions' in attrs:
+                raise serializers.ValidationError("Provide either 'matrix' or 'role' with 'permissions', not both.")
+            entries = attrs['matrix']
+        elif 'role' in attrs and 'permissions' in attrs:
+            entries = [{'role': attrs['role'], 'permissions': attrs['permissions']}]
+        else:
+            raise serializers.ValidationError("Provide 'role' with 'permissions', or a 'matrix'.")
+
+        matrix = {}
+        for entry in entries:
+            if entry['role'] in matrix:
+                raise serializers.ValidationError({'matrix': f"Role {entry['role']} is listed more than once."})
+            matrix[entry['role']] = set(entry['permissions'])
+
+        missing_roles = set(matrix) - set(Role.objects.filter(id__in=matrix).values_list('id', flat=True))
+        if missing_roles:
+            raise serializers.ValidationError({'role': f"Roles not found: {sorted(missing_roles)}"})
+        permission_ids = set().union(*matrix.values())
+        missing_permissions = permission_ids - set(
+            Permission.objects.filter(id__in=permission_ids).values_list('id', flat=True)
+        )
+        if missing_permissions:
+            raise serializers.ValidationError({'permissions': f"Permissions not found: {sorted(missing_permissions)}"})
+        return {'matrix': matrix}
+
 class RolePermissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = RolePermission
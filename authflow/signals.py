@@ -0,0 +1,27 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token, invalidate_user_tokens
+from .models import CustomUser, Permission, RolePermission
+from .permissions import bump_permission_version, in_permission_batch
+
+# Cache invalidation runs on commit so no other request can re-cache the old rows in between.
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    # Password, activation and role changes must not be served from a stale cache
+    if not created:
+        transaction.on_commit(partial(invalidate_user_tokens, instance.pk))
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_token, instance.key))
+
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+@receiver(post_save, sender=Permission)
+def bump_role_permissions(sender, **kwargs):
+    if not in_permission_batch():
+        transaction.on_commit(bump_permission_version)
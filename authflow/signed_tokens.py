@@ -0,0 +1,116 @@
+import base64
+import json
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.functional import cached_property
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+KEY_SALT = 'authflow.signed_tokens.access'
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload):
+    return _b64encode(salted_hmac(KEY_SALT, payload, algorithm='sha256').digest())
+
+
+def issue_access_token(user):
+    """
+    Short-lived, self-contained access token: ``<payload>.<signature>`` where
+    the payload carries the user id, role id, expiry and staff/superuser
+    flags and the signature is an HMAC-SHA256 keyed from SECRET_KEY.
+    """
+    claims = {
+        'uid': user.pk,
+        'rid': user.role_id,
+        'exp': int(time.time()) + settings.ACCESS_TOKEN_TTL,
+    }
+    if user.is_superuser:
+        claims['su'] = True
+    if user.is_staff:
+        claims['st'] = True
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{payload}.{_sign(payload)}'
+
+
+def decode_access_token(token):
+    try:
+        payload, signature = token.split('.')
+    except ValueError:
+        raise exceptions.AuthenticationFailed('Malformed access token.')
+    if not constant_time_compare(signature, _sign(payload)):
+        raise exceptions.AuthenticationFailed('Invalid access token.')
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise exceptions.AuthenticationFailed('Malformed access token.')
+    if claims.get('exp', 0) <= time.time():
+        raise exceptions.AuthenticationFailed('Access token has expired.')
+    return claims
+
+
+class TokenUser:
+    """
+    User built from the claims of a signed access token, without touching the
+    database. Carries what authorization needs (id, role id, staff and
+    superuser flags);
+    use ``instance`` when the full row is required.
+    """
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims):
+        self.id = self.pk = claims['uid']
+        self.role_id = claims.get('rid')
+        self.is_superuser = bool(claims.get('su'))
+        self.is_staff = bool(claims.get('st'))
+
+    @cached_property
+    def instance(self):
+        from .models import CustomUser
+        return CustomUser.objects.get(pk=self.pk)
+
+    def __str__(self):
+        return f'TokenUser {self.id}'
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Validates ``Authorization: Bearer <access token>`` by signature and expiry
+    alone, so authentication scales with CPU rather than database
+    connections. Access tokens are renewed through the refresh endpoint with
+    the database-backed token returned at login.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        claims = decode_access_token(token)
+        return TokenUser(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
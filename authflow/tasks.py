@@ -0,0 +1,23 @@
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.utils.timezone import now, timedelta
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def purge_expired_tokens(chunk_size=None, max_chunks=None):
+    # Delete in small chunks so no run holds long locks on the token table
+    chunk_size = chunk_size or settings.AUTH_TOKEN_SWEEP_CHUNK_SIZE
+    max_chunks = max_chunks or settings.AUTH_TOKEN_SWEEP_MAX_CHUNKS
+    cutoff = now() - timedelta(seconds=settings.AUTH_TOKEN_TTL)
+
+    deleted = 0
+    for _ in range(max_chunks):
+        keys = list(Token.objects.filter(created__lte=cutoff).values_list('key', flat=True)[:chunk_size])
+        if not keys:
+            break
+        deleted += Token.objects.filter(key__in=keys, created__lte=cutoff).delete()[0]
+    logger.info("Purged %s expired auth tokens.", deleted)
+    return deleted
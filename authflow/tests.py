@@ -1,7 +1,30 @@
+import io
+import json
+import threading
+from unittest import mock
+from datetime import timedelta
 from django.test import TestCase
+from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
 from django.core.exceptions import ValidationError
+from django.test import override_settings, AsyncClient, RequestFactory
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, ValidationError as DRFValidationError
+from rest_framework.test import APIClient
 from .models import Role, Permission, RolePermission, CustomUser
+from notifications.models import OutboundEmail
+from .otp import OTP_LIMITED, OTP_SENT, get_otp_store, issue_otp
+from .serializers import RegisterSerializer
+from .bulk_import import UserImporter, iter_rows
+from .authentication import CachedTokenAuthentication, auth_cache_stats, _local_tokens, issue_token
+from .signed_tokens import SignedTokenAuthentication, issue_access_token
+from .tasks import purge_expired_tokens
+from .throttling import SlidingWindowLimiter
+from .permissions import HasRolePermission, user_has_permissions, clear_local_permissions
 
 class RoleTests(TestCase):
     def setUp(self):
@@ -187,3 +210,746 @@ class UserAuthenticationTests(TestCase):
             password=self.user_data['password']
         )
         self.assertIsNone(authenticated_user)
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    OTP_STORE_BACKEND='authflow.otp.LocMemOTPStore',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OTPStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = get_otp_store()
+        self.store.clear()
+
+    def test_set_get_delete(self):
+        """Test storing, reading and removing an OTP"""
+        self.store.set('test@example.com', '123456')
+        self.assertEqual(self.store.get('test@example.com')['otp'], '123456')
+        self.store.delete('test@example.com')
+        self.assertIsNone(self.store.get('test@example.com'))
+
+    def test_entries_expire(self):
+        """Test that expired OTPs are dropped by the store itself"""
+        self.store.set('test@example.com', '123456', ttl=0)
+        self.assertIsNone(self.store.get('test@example.com'))
+        self.store.set('other@example.com', '654321')
+        self.assertNotIn('test@example.com', self.store._entries)
+
+    def test_registration_otp_flow(self):
+        """Test that the OTP issued on registration activates the user"""
+        client = APIClient()
+        response = client.post('/api/auth/register/', {
+            'username': 'newuser',
+            'first_name': 'New',
+            'last_name': 'User',
+            'email': 'new@example.com',
+            'password': 'newpass123',
+            'phone_number': '5555555555',
+        })
+        self.assertEqual(response.status_code, 201)
+        otp = self.store.get('new@example.com')['otp']
+
+        response = client.post('/api/auth/verify-otp/', {'email': 'new@example.com', 'otp': otp})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(CustomUser.objects.get(email='new@example.com').is_active)
+        self.assertIsNone(self.store.get('new@example.com'))
+
+    @override_settings(OTP_RESEND_COOLDOWN=60, OTP_MAX_ISSUES_PER_HOUR=5)
+    def test_resend_within_cooldown_reuses_code(self):
+        """Test that repeated OTP requests inside the cooldown neither rotate the code nor mail it again"""
+        CustomUser.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123', phone_number='1234567890'
+        )
+        client = APIClient()
+        for _ in range(3):
+            response = client.post('/api/auth/forgot-password/', {'email': 'test@example.com'})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+        self.assertEqual(self.store.get('test@example.com')['otp'], OutboundEmail.objects.get().body.split()[3].rstrip('.'))
+
+    @override_settings(OTP_RESEND_COOLDOWN=0, OTP_MAX_ISSUES_PER_HOUR=2)
+    def test_hourly_issue_cap(self):
+        """Test that OTP issuance per email is capped per hour"""
+        self.assertEqual([issue_otp('test@example.com') for _ in range(3)], [OTP_SENT, OTP_SENT, OTP_LIMITED])
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        self.assertIsNotNone(self.store.get('test@example.com'))
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local_tokens.clear()
+        auth_cache_stats.reset()
+        self.role = Role.objects.create(name='Test Role')
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            phone_number='1234567890',
+            role=self.role,
+            is_active=True
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_cached_lookup_skips_database(self):
+        """Test that only the first lookup of a token touches the database"""
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.role_id, self.role.pk)
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+        _local_tokens.clear()
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(auth_cache_stats.as_dict(), {'local_hits': 1, 'shared_hits': 1, 'misses': 1})
+
+    def test_cache_holds_only_auth_fields(self):
+        """Test that the caches store auth fields rather than the user row, which is loaded on demand"""
+        self.auth.authenticate_credentials(self.token.key)
+        entry = caches[settings.AUTH_TOKEN_CACHE_ALIAS].get(f'authtoken:v2:{self.token.key}')
+        self.assertEqual(entry, ((self.user.pk, self.role.pk, True, False, False), self.token.created))
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(token.user, user)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'test@example.com')
+
+    def test_deactivation_invalidates_cache(self):
+        """Test that deactivating a user evicts their cached token"""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_logout_invalidates_cache(self):
+        """Test that logging out revokes the cached token"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(client.post('/api/auth/logout/').status_code, 401)
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RolePermissionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_permissions()
+        self.role = Role.objects.create(name='Manager')
+        self.view_perm = Permission.objects.create(name='view_reports')
+        self.edit_perm = Permission.objects.create(name='edit_reports')
+        RolePermission.objects.create(role=self.role, permission=self.view_perm)
+        self.user = CustomUser.objects.create_user(
+            username='manager',
+            email='manager@example.com',
+            password='manager123',
+            phone_number='1234567890',
+            role=self.role,
+            is_active=True
+        )
+
+    def test_permission_check_is_cached(self):
+        """Test that repeated permission checks don't query the database"""
+        self.assertTrue(user_has_permissions(self.user, ['view_reports']))
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permissions(self.user, ['view_reports']))
+            self.assertFalse(user_has_permissions(self.user, ['edit_reports']))
+
+    def test_role_permission_change_bumps_version(self):
+        """Test that assigning a permission is visible after the version bump"""
+        self.assertFalse(user_has_permissions(self.user, ['edit_reports']))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/api/auth/role-permissions/', {
+                'role': self.role.pk, 'permission': self.edit_perm.pk
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(user_has_permissions(self.user, ['edit_reports']))
+
+    def test_permission_class(self):
+        """Test the DRF permission class against per-method requirements"""
+        view = type('View', (), {'required_permissions': {'GET': ['view_reports'], 'POST': ['edit_reports']}})()
+        permission = HasRolePermission()
+        request = type('Request', (), {'user': self.user, 'method': 'GET'})()
+        self.assertTrue(permission.has_permission(request, view))
+        request.method = 'POST'
+        self.assertFalse(permission.has_permission(request, view))
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    AUTH_THROTTLE_RATES={
+        'login_email': {'limit': 3, 'window': 300, 'lockout': 60},
+        'login_ip': {'limit': 100, 'window': 300, 'lockout': 60},
+        'otp_email': {'limit': 3, 'window': 300, 'lockout': 60},
+        'otp_ip': {'limit': 100, 'window': 300, 'lockout': 60},
+    },
+)
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            phone_number='1234567890',
+            is_active=True
+        )
+
+    def login(self, password='wrongpass'):
+        return self.client.post('/api/auth/login/', {'email': 'test@example.com', 'password': password})
+
+    def test_login_lockout_skips_hashing(self):
+        """Test that locked out logins are rejected before any password check"""
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 401)
+        with mock.patch.object(CustomUser, 'check_password') as check_password:
+            with self.assertNumQueries(0):
+                response = self.login(password='testpass123')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        check_password.assert_not_called()
+
+    def test_lockout_backs_off(self):
+        """Test that repeated lockouts last longer each time"""
+        limiter = SlidingWindowLimiter('login_email', limit=1, window=300, lockout=10)
+        self.assertEqual(limiter.hit('a@example.com'), 0)
+        self.assertEqual(limiter.hit('a@example.com'), 10)
+        cache.delete(limiter.make_key('lock', 'a@example.com'))
+        self.assertEqual(limiter.hit('a@example.com'), 20)
+
+    def test_successful_login_resets_counter(self):
+        """Test that a successful login clears the per-email counter"""
+        self.login()
+        self.login()
+        self.assertEqual(self.login(password='testpass123').status_code, 200)
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 401)
+
+    def test_spoofed_forwarded_for_does_not_reset_ip_window(self):
+        """Test that rotating X-Forwarded-For does not give a client a fresh per-IP window"""
+        rates = dict(settings.AUTH_THROTTLE_RATES, login_ip={'limit': 2, 'window': 300, 'lockout': 60})
+        with self.settings(AUTH_THROTTLE_RATES=rates):
+            statuses = [
+                self.client.post(
+                    '/api/auth/login/', {'email': f'user{i}@example.com', 'password': 'wrongpass'},
+                    HTTP_X_FORWARDED_FOR=f'203.0.113.{i}'
+                ).status_code
+                for i in range(3)
+            ]
+        self.assertEqual(statuses, [401, 401, 429])
+
+    def test_otp_endpoints_share_limit(self):
+        """Test that OTP verification and password reset are throttled together"""
+        self.client.post('/api/auth/verify-otp/', {'email': 'test@example.com', 'otp': '000000'})
+        self.client.post('/api/auth/verify-otp/', {'email': 'test@example.com', 'otp': '000000'})
+        self.client.post('/api/auth/reset-password/', {'email': 'test@example.com', 'otp': '000000', 'new_password': 'x'})
+        response = self.client.post('/api/auth/reset-password/', {'email': 'test@example.com', 'otp': '000000', 'new_password': 'x'})
+        self.assertEqual(response.status_code, 429)
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    OTP_STORE_BACKEND='authflow.otp.LocMemOTPStore',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class AsyncAuthViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+
+    async def test_async_register_and_login(self):
+        """Test registering and logging in through the async endpoints"""
+        response = await self.client.post('/api/auth/async/register/', {
+            'username': 'asyncuser',
+            'first_name': 'Async',
+            'last_name': 'User',
+            'email': 'async@example.com',
+            'password': 'asyncpass123',
+            'phone_number': '5555555555',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        user = await CustomUser.objects.aget(email='async@example.com')
+        self.assertTrue(user.check_password('asyncpass123'))
+        self.assertIsNotNone(get_otp_store().get('async@example.com'))
+
+        credentials = {'email': 'async@example.com', 'password': 'asyncpass123'}
+        response = await self.client.post('/api/auth/async/login/', credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        user.is_active = True
+        await user.asave()
+        response = await self.client.post('/api/auth/async/login/', credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await Token.objects.filter(key=response.json()['token']).aexists())
+
+    async def test_async_login_upgrades_hash_outside_hash_pool(self):
+        """Test that an outdated password hash is upgraded on login, with the save made outside the hashing threads"""
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher', 'django.contrib.auth.hashers.PBKDF2PasswordHasher']
+        with self.settings(PASSWORD_HASHERS=hashers):
+            user = await CustomUser.objects.acreate(
+                username='rehash', email='rehash@example.com', phone_number='5550001', is_active=True,
+                password=PBKDF2PasswordHasher().encode('rehashpass1', 'salt', iterations=1)
+            )
+            saving_threads = []
+            original_save = CustomUser.save
+
+            def save(instance, *args, **kwargs):
+                saving_threads.append(threading.current_thread().name)
+                return original_save(instance, *args, **kwargs)
+
+            with mock.patch.object(CustomUser, 'save', save):
+                response = await self.client.post(
+                    '/api/auth/async/login/', {'email': 'rehash@example.com', 'password': 'rehashpass1'},
+                    content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 200)
+            await user.arefresh_from_db()
+            self.assertTrue(user.password.startswith('md5$'))
+            self.assertEqual(len(saving_threads), 1)
+            self.assertFalse(saving_threads[0].startswith('password-hash'))
+
+    async def test_async_register_validation(self):
+        """Test that the async register endpoint reports serializer errors"""
+        response = await self.client.post('/api/auth/async/register/', {'email': 'bad'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+class RegisterSerializerTests(TestCase):
+    def setUp(self):
+        self.existing = CustomUser.objects.create_user(
+            username='taken',
+            email='taken@example.com',
+            password='testpass123',
+            phone_number='1234567890'
+        )
+        self.data = {
+            'username': 'taken',
+            'first_name': 'New',
+            'last_name': 'User',
+            'email': 'taken@example.com',
+            'password': 'newpass123',
+            'phone_number': '1234567890',
+        }
+
+    def test_uniqueness_checked_in_one_query(self):
+        """Test that all unique fields are validated with a single query"""
+        serializer = RegisterSerializer(data=self.data)
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['username'], ['A user with this username already exists.'])
+        self.assertEqual(serializer.errors['email'], ['A user with this email already exists.'])
+        self.assertEqual(serializer.errors['phone_number'], ['A user with this phone number already exists.'])
+
+    def test_conflicts_reported_with_field_errors(self):
+        """Test that a duplicate email is reported alongside an invalid password"""
+        serializer = RegisterSerializer(data={**self.data, 'username': 'fresh', 'phone_number': '5550000', 'password': ''})
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'password', 'email'})
+        self.assertEqual(serializer.errors['email'], ['A user with this email already exists.'])
+
+    def test_integrity_error_maps_to_field_errors(self):
+        """Test that a sign-up racing past validation gets the same field error"""
+        self.data.update(username='fresh', phone_number='5555555555')
+        with self.assertRaises(DRFValidationError) as ctx:
+            RegisterSerializer().create(self.data)
+        self.assertEqual(ctx.exception.detail, {'email': ['A user with this email already exists.']})
+
+@override_settings(CACHES=LOCMEM_CACHES, PASSWORD_HASH_WORKERS=1)
+class UserImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_permissions()
+        self.role = Role.objects.create(name='Team Member')
+        CustomUser.objects.create_user(
+            username='existing',
+            email='existing@example.com',
+            password='testpass123',
+            phone_number='1111111111'
+        )
+        self.admin = CustomUser.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            phone_number='0000000000'
+        )
+
+    def test_import_csv(self):
+        """Test a CSV import reports created, duplicate and invalid rows"""
+        content = (
+            "username,email,phone_number,password,first_name,last_name,role,is_active\n"
+            "alice,alice@example.com,2222222222,alicepass1,Alice,A,Team Member,true\n"
+            "existing,other@example.com,3333333333,pass12345,,,,\n"
+            "bob,alice@example.com,4444444444,bobpass123,,,,\n"
+            "carol,not-an-email,5555555555,carolpass1,,,,\n"
+            "dave,dave@example.com,6666666666,davepass12,,,Unknown,\n"
+        )
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post('/api/auth/users/import/', {
+            'file': SimpleUploadedFile('users.csv', content.encode()), 'format': 'csv'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary'], {'created': 1, 'duplicate': 2, 'invalid': 2})
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['created', 'duplicate', 'duplicate', 'invalid', 'invalid'])
+        alice = CustomUser.objects.get(username='alice')
+        self.assertEqual(alice.role, self.role)
+        self.assertTrue(alice.is_active)
+        self.assertTrue(alice.check_password('alicepass1'))
+
+    def test_import_ndjson_in_chunks(self):
+        """Test streaming NDJSON import across several chunks"""
+        lines = [json.dumps({
+            'username': f'user{i}', 'email': f'user{i}@example.com',
+            'phone_number': f'90000000{i:02d}', 'password': 'pass12345'
+        }) for i in range(7)]
+        lines.append('{not json')
+        results = list(UserImporter(chunk_size=3).run(iter_rows(io.StringIO('\n'.join(lines)), 'ndjson')))
+        self.assertEqual([r['status'] for r in results], ['created'] * 7 + ['invalid'])
+        self.assertEqual(CustomUser.objects.filter(username__startswith='user').count(), 7)
+
+    def test_import_catches_duplicates_across_chunks(self):
+        """Test that rows repeating an earlier chunk are reported as duplicates"""
+        rows = [
+            {'username': 'first', 'email': 'first@example.com', 'phone_number': '8000000001', 'password': 'pass12345'},
+            {'username': 'second', 'email': 'second@example.com', 'phone_number': '8000000002', 'password': 'pass12345'},
+            {'username': 'third', 'email': 'first@example.com', 'phone_number': '8000000003', 'password': 'pass12345'},
+            {'username': 'fourth', 'email': 'fourth@example.com', 'phone_number': '8000000004', 'password': 'pass12345'},
+            {'username': 'fifth', 'email': 'fourth@example.com', 'phone_number': '8000000005', 'password': 'pass12345'},
+        ]
+        results = list(UserImporter(chunk_size=2).run(rows))
+        self.assertEqual([r['status'] for r in results], ['created', 'created', 'duplicate', 'created', 'duplicate'])
+        self.assertEqual(results[2]['fields'], ['email'])
+
+    def test_upload_hashes_without_processes(self):
+        """Test that the upload endpoint never starts a process pool"""
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        content = "username,email,phone_number,password\nzed,zed@example.com,7777777777,zedpass123\n"
+        with self.settings(PASSWORD_HASH_WORKERS=2), mock.patch('authflow.bulk_import.ProcessPoolExecutor') as pool:
+            response = client.post('/api/auth/users/import/', {'file': SimpleUploadedFile('users.csv', content.encode())})
+        self.assertEqual(response.data['summary'], {'created': 1, 'duplicate': 0, 'invalid': 0})
+        pool.assert_not_called()
+
+    def test_import_requires_permission(self):
+        """Test that importing users requires the import_users permission"""
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.get(username='existing'))
+        response = client.post('/api/auth/users/import/', {'file': SimpleUploadedFile('users.csv', b'')})
+        self.assertEqual(response.status_code, 403)
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        self.role = Role.objects.create(name='Developer')
+        self.users = [
+            CustomUser.objects.create_user(
+                username=f'dev{i}',
+                email=f'dev{i}@example.com',
+                password='testpass123',
+                first_name='Devon' if i % 2 else 'Alex',
+                last_name='Smith',
+                phone_number=f'55500000{i:02d}',
+                role=self.role if i < 4 else None,
+                is_active=i % 3 != 0
+            )
+            for i in range(6)
+        ]
+        self.client = APIClient()
+
+    def test_search_and_filters(self):
+        """Test substring/prefix search combined with role and active filters"""
+        response = self.client.get('/api/auth/users/directory/', {'q': 'evo'})
+        self.assertEqual([u['username'] for u in response.data['results']], ['dev1', 'dev3', 'dev5'])
+
+        response = self.client.get('/api/auth/users/directory/', {'q': 'evo', 'match': 'prefix'})
+        self.assertEqual(response.data['results'], [])
+
+        response = self.client.get('/api/auth/users/directory/', {'role': self.role.pk, 'is_active': 'true'})
+        self.assertEqual([u['username'] for u in response.data['results']], ['dev1', 'dev2'])
+        self.assertEqual(response.data['results'][0]['role_name'], 'Developer')
+
+    def test_user_list_pages_on_request(self):
+        """Test that the user list keeps its full response by default and pages by ID with limit/cursor"""
+        response = self.client.get('/api/auth/users/')
+        self.assertEqual(len(response.data), 6)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/users/', {'limit': 4})
+        self.assertEqual([u['username'] for u in response.data['results']], ['dev0', 'dev1', 'dev2', 'dev3'])
+        response = self.client.get('/api/auth/users/', {'limit': 4, 'cursor': response.data['next_cursor']})
+        self.assertEqual([u['username'] for u in response.data['results']], ['dev4', 'dev5'])
+        self.assertIsNone(response.data['next_cursor'])
+        self.assertEqual(self.client.get('/api/auth/users/', {'limit': 'x'}).status_code, 400)
+
+    def test_keyset_pagination(self):
+        """Test walking the directory page by page with a cursor in one query per page"""
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 4}
+            if cursor:
+                params['cursor'] = cursor
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/auth/users/directory/', params)
+            seen += [u['id'] for u in response.data['results']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [u.pk for u in self.users])
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkRoleAssignmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local_tokens.clear()
+        self.dev = Role.objects.create(name='Developer')
+        self.lead = Role.objects.create(name='Lead')
+        self.users = [
+            CustomUser.objects.create_user(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='testpass123',
+                phone_number=f'44400000{i:02d}',
+                role=self.dev,
+                is_active=True
+            )
+            for i in range(4)
+        ]
+        self.admin = CustomUser.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            phone_number='0000000000'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_assignments_apply_with_one_update_per_role(self):
+        """Test per-id outcomes and that each target role costs one UPDATE"""
+        payload = {'assignments': [
+            {'id': self.users[0].pk, 'role': self.lead.pk},
+            {'id': self.users[1].pk, 'role': self.lead.pk},
+            {'id': self.users[2].pk, 'role': None},
+            {'id': 999999, 'role': self.lead.pk},
+            {'id': self.users[3].pk, 'role': 999999},
+        ]}
+        # role lookup, locked user lookup, two UPDATEs, plus savepoint bookkeeping
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/auth/users/roles/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['updated', 'updated', 'updated', 'not_found', 'invalid_role'])
+        self.assertEqual(CustomUser.objects.filter(role=self.lead).count(), 2)
+        self.assertIsNone(CustomUser.objects.get(pk=self.users[2].pk).role)
+        self.assertEqual(CustomUser.objects.get(pk=self.users[3].pk).role, self.dev)
+
+    def test_filter_assignment_invalidates_only_affected_tokens(self):
+        """Test moving users by filter evicts cached auth for those users only"""
+        auth = CachedTokenAuthentication()
+        moved = Token.objects.create(user=self.users[0])
+        self.users[1].is_active = False
+        self.users[1].save()
+        stayed = Token.objects.create(user=self.users[1])
+        auth.authenticate_credentials(moved.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/users/roles/', {
+                'filter': {'role': self.dev.pk, 'is_active': True}, 'role': self.lead.pk
+            }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertNotIn(self.users[1].pk, response.data['ids'])
+        user, _ = auth.authenticate_credentials(moved.key)
+        self.assertEqual(user.role_id, self.lead.pk)
+        self.assertEqual(CustomUser.objects.get(pk=self.users[1].pk).role, self.dev)
+
+    def test_filter_requires_target_role(self):
+        """Test that filter mode must name a target role"""
+        response = self.client.post('/api/auth/users/roles/', {'filter': {'is_active': True}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RolePermissionSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_permissions()
+        self.dev = Role.objects.create(name='Developer')
+        self.lead = Role.objects.create(name='Lead')
+        self.perms = [Permission.objects.create(name=f'perm{i}') for i in range(4)]
+        RolePermission.objects.create(role=self.dev, permission=self.perms[0])
+        RolePermission.objects.create(role=self.dev, permission=self.perms[1])
+        self.admin = CustomUser.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            phone_number='0000000000'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def current(self, role):
+        return set(RolePermission.objects.filter(role=role).values_list('permission_id', flat=True))
+
+    def test_sync_single_role(self):
+        """Test that only the difference is written and the version is bumped once"""
+        with mock.patch('authflow.role_permission_sync.bump_permission_version') as bump, \
+                mock.patch('authflow.signals.bump_permission_version') as signal_bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.put('/api/auth/role-permissions/sync/', {
+                    'role': self.dev.pk, 'permissions': [self.perms[1].pk, self.perms[2].pk]
+                }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'role': self.dev.pk, 'added': [self.perms[2].pk], 'removed': [self.perms[0].pk]}
+        ])
+        self.assertEqual(self.current(self.dev), {self.perms[1].pk, self.perms[2].pk})
+        bump.assert_called_once()
+        signal_bump.assert_not_called()
+
+    def test_sync_matrix(self):
+        """Test syncing several roles at once, including clearing one"""
+        response = self.client.put('/api/auth/role-permissions/sync/', {'matrix': [
+            {'role': self.dev.pk, 'permissions': []},
+            {'role': self.lead.pk, 'permissions': [p.pk for p in self.perms]},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.current(self.dev), set())
+        self.assertEqual(self.current(self.lead), {p.pk for p in self.perms})
+
+    def test_sync_rejects_unknown_ids(self):
+        """Test that unknown roles or permissions are rejected before any write"""
+        response = self.client.put('/api/auth/role-permissions/sync/', {
+            'role': self.dev.pk, 'permissions': [self.perms[0].pk, 999999]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('permissions', response.data)
+        self.assertEqual(self.current(self.dev), {self.perms[0].pk, self.perms[1].pk})
+
+@override_settings(CACHES=LOCMEM_CACHES, AUTH_TOKEN_TTL=3600, AUTH_TOKEN_REFRESH_AFTER=600)
+class TokenExpiryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local_tokens.clear()
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            phone_number='1234567890',
+            is_active=True
+        )
+        self.auth = CachedTokenAuthentication()
+
+    def make_token(self, age, user=None):
+        token = Token.objects.create(user=user or self.user)
+        Token.objects.filter(pk=token.pk).update(created=timezone.now() - timedelta(seconds=age))
+        return token
+
+    def test_expired_token_rejected(self):
+        """Test that tokens past their TTL no longer authenticate"""
+        token = self.make_token(age=7200)
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(token.key)
+
+    def test_sliding_refresh(self):
+        """Test that an older token is refreshed when used"""
+        token = self.make_token(age=1800)
+        _, refreshed = self.auth.authenticate_credentials(token.key)
+        self.assertGreater(refreshed.created, timezone.now() - timedelta(seconds=5))
+        self.assertGreater(Token.objects.get(pk=token.pk).created, timezone.now() - timedelta(seconds=5))
+
+    def test_login_replaces_expired_token(self):
+        """Test that logging in issues a fresh token once the old one expired"""
+        expired = self.make_token(age=7200)
+        token = issue_token(self.user)
+        self.assertNotEqual(token.key, expired.key)
+        self.assertFalse(Token.objects.filter(key=expired.key).exists())
+
+    def test_sweeper_deletes_in_chunks(self):
+        """Test that the sweeper removes only expired tokens and reports the count"""
+        users = [CustomUser.objects.create_user(
+            username=f'user{i}', email=f'user{i}@example.com', password='x', phone_number=f'99{i}'
+        ) for i in range(5)]
+        for user in users[:4]:
+            self.make_token(age=7200, user=user)
+        live = self.make_token(age=10, user=users[4])
+        self.assertEqual(purge_expired_tokens(chunk_size=3), 4)
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [live.key])
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    AUTH_THROTTLE_CACHE_ALIAS='default',
+    ACCESS_TOKEN_TTL=300,
+)
+class SignedTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _local_tokens.clear()
+        self.role = Role.objects.create(name='Test Role')
+        self.user = CustomUser.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            phone_number='1234567890',
+            role=self.role,
+            is_active=True
+        )
+        self.client = APIClient()
+        self.auth = SignedTokenAuthentication()
+
+    def authenticate(self, access):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.auth.authenticate(request)
+
+    def test_login_returns_access_token(self):
+        """Test that login issues a signed access token that validates without queries"""
+        response = self.client.post('/api/auth/login/', {
+            'email': 'test@example.com', 'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Token.objects.filter(key=response.data['token']).exists())
+        with self.assertNumQueries(0):
+            user, claims = self.authenticate(response.data['access'])
+        self.assertEqual((user.pk, user.role_id), (self.user.pk, self.role.pk))
+        self.assertFalse(user.is_superuser)
+
+    def test_tampered_and_expired_tokens_rejected(self):
+        """Test that a modified signature or an expired token is rejected"""
+        access = issue_access_token(self.user)
+        payload, signature = access.split('.')
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(f'{payload}.{signature[::-1]}')
+        with mock.patch('authflow.signed_tokens.time.time', return_value=timezone.now().timestamp() + 301):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(access)
+        self.assertIsNone(self.auth.authenticate(RequestFactory().get('/', HTTP_AUTHORIZATION='Token abc')))
+
+    def test_staff_claim_passes_admin_checks(self):
+        """Test that a staff user's access token is accepted by admin-only views and a regular user's is not"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_access_token(self.user)}')
+        self.assertEqual(self.client.get('/api/auth/auth-cache-stats/').status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        access = issue_access_token(self.user)
+        self.assertTrue(self.authenticate(access)[0].is_staff)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/auth/auth-cache-stats/').status_code, 200)
+
+    def test_refresh_and_logout(self):
+        """Test that the refresh token mints access tokens until it is revoked"""
+        token = issue_token(self.user)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': token.key}, format='json')
+        self.assertEqual(response.status_code, 200)
+        user, _ = self.authenticate(response.data['access'])
+        self.assertEqual(user.pk, self.user.pk)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.client.credentials()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': token.key}, format='json')
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,104 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window attempt counter kept in the Django cache. The window is
+    approximated from the current and previous fixed buckets, so a check
+    costs one ``get_many`` and one ``incr``. Going over the limit locks the
+    key out; every further lockout inside ``window`` lasts ``backoff`` times
+    longer, capped at AUTH_THROTTLE_MAX_LOCKOUT.
+    """
+
+    def __init__(self, scope, limit, window, lockout):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.lockout = lockout
+
+    @classmethod
+    def for_scope(cls, scope):
+        return cls(scope, **settings.AUTH_THROTTLE_RATES[scope])
+
+    @property
+    def cache(self):
+        return caches[settings.AUTH_THROTTLE_CACHE_ALIAS]
+
+    def make_key(self, kind, ident, suffix=''):
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        return f'throttle:{self.scope}:{kind}:{digest}{suffix}'
+
+    def hit(self, ident):
+        """Count one attempt and return the seconds to wait, 0 if allowed."""
+        current = time.time()
+        bucket = int(current // self.window)
+        lock_key = self.make_key('lock', ident)
+        prev_key = self.make_key('count', ident, f':{bucket - 1}')
+        curr_key = self.make_key('count', ident, f':{bucket}')
+
+        cached = self.cache.get_many([lock_key, prev_key])
+        locked_until = cached.get(lock_key)
+        if locked_until and locked_until > current:
+            return locked_until - current
+
+        if self.cache.add(curr_key, 1, timeout=self.window * 2):
+            count = 1
+        else:
+            count = self.cache.incr(curr_key)
+        elapsed = (current % self.window) / self.window
+        estimated = cached.get(prev_key, 0) * (1 - elapsed) + count
+        if estimated <= self.limit:
+            return 0
+        return self.lock(ident, current)
+
+    def lock(self, ident, current):
+        strikes_key = self.make_key('strikes', ident)
+        if self.cache.add(strikes_key, 1, timeout=settings.AUTH_THROTTLE_MAX_LOCKOUT):
+            strikes = 1
+        else:
+            strikes = self.cache.incr(strikes_key)
+        duration = min(
+            self.lockout * settings.AUTH_THROTTLE_BACKOFF ** (strikes - 1),
+            settings.AUTH_THROTTLE_MAX_LOCKOUT,
+        )
+        self.cache.set(self.make_key('lock', ident), current + duration, timeout=int(duration) + 1)
+        return duration
+
+    def reset(self, ident):
+        bucket = int(time.time() // self.window)
+        self.cache.delete_many([
+            self.make_key('lock', ident),
+            self.make_key('strikes', ident),
+            self.make_key('count', ident, f':{bucket - 1}'),
+            self.make_key('count', ident, f':{bucket}'),
+        ])
+
+
+def reset_auth_attempts(scope, email):
+    SlidingWindowLimiter.for_scope(f'{scope}_email').reset(email.strip().lower())
+
+
+class AuthAttemptThrottle(BaseThrottle):
+    """
+    Throttles credential and OTP endpoints per submitted email and per
+    client IP before the view does any database or hashing work. Views set
+    ``auth_throttle_scope``; rates come from AUTH_THROTTLE_RATES.
+    """
+
+    def allow_request(self, request, view):
+        if request.method != 'POST':
+            return True
+        scope = view.auth_throttle_scope
+        self.wait_seconds = SlidingWindowLimiter.for_scope(f'{scope}_ip').hit(self.get_ident(request))
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not self.wait_seconds and isinstance(email, str) and email:
+            self.wait_seconds = SlidingWindowLimiter.for_scope(f'{scope}_email').hit(email.strip().lower())
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
@@ -3,8 +3,11 @@ from .views import (
     RegisterView, OTPVerificationView, LoginView,
     ForgotPasswordView, ResetPasswordView, RoleView, 
     PermissionView, UserManagementView,RolePermissionListView, 
-    RolePermissionDeleteView
+    RolePermissionDeleteView, LogoutView, AuthCacheStatsView,
+    UserImportView, UserDirectoryView, BulkRoleAssignmentView,
+    RolePermissionSyncView, TokenRefreshView
 )
+from .async_views import AsyncLoginView, AsyncRegisterView
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework.permissions import AllowAny
@@ -23,12 +26,21 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('verify-otp/', OTPVerificationView.as_view(), name='verify_otp'),
     path('login/', LoginView.as_view(), name='login'),
+    path('async/register/', AsyncRegisterView.as_view(), name='async_register'),
+    path('async/login/', AsyncLoginView.as_view(), name='async_login'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('auth-cache-stats/', AuthCacheStatsView.as_view(), name='auth_cache_stats'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
     path('reset-password/', ResetPasswordView.as_view(), name='reset_password'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('roles/', RoleView.as_view(), name='roles'),
     path('permissions/', PermissionView.as_view(), name='permissions'),
     path('users/', UserManagementView.as_view(), name='users'),
+    path('users/directory/', UserDirectoryView.as_view(), name='user_directory'),
+    path('users/roles/', BulkRoleAssignmentView.as_view(), name='bulk_role_assignment'),
+    path('users/import/', UserImportView.as_view(), name='user_import'),
     path('role-permissions/', RolePermissionListView.as_view(), name='role_permissions'),
+    path('role-permissions/sync/', RolePermissionSyncView.as_view(), name='sync_role_permissions'),
     path('role-permissions/<int:pk>/', RolePermissionDeleteView.as_view(), name='delete_role_permission'),
 ]
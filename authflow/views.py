@@ -1,63 +1,84 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView, DestroyAPIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework import status
-from django.utils.timezone import now, timedelta
-from django.core.mail import send_mail
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
+from django.utils.timezone import now
+from django.db import transaction
 from rest_framework.authtoken.models import Token
 from drf_yasg.utils import swagger_auto_schema
-from .models import CustomUser, Role, Permission,RolePermission
+from .models import CustomUser, Role, Permission,RolePermission, DIRECTORY_SEARCH_FIELDS
+from django.db.models import Q
+from .otp import OTP_LIMITED, get_otp_store, issue_otp, send_activation_otp
+from .authentication import CachedTokenAuthentication, auth_cache_stats, issue_token
+from .signed_tokens import issue_access_token
+from .throttling import AuthAttemptThrottle, reset_auth_attempts
+from .permissions import HasRolePermission
+from .bulk_import import UserImporter, iter_rows
+from .role_assignment import assign_roles, assign_role_by_filter
+from .role_permission_sync import sync_role_permissions
 from .serializers import (
     RegisterSerializer, LoginSerializer, OTPVerificationSerializer,
-    ForgotPasswordSerializer, ResetPasswordSerializer,RoleSerializer,
-    PermissionSerializer, UserManagementSerializer,RolePermissionSerializer
+    ForgotPasswordSerializer, ResetPasswordSerializer,RoleSerializer, TokenRefreshSerializer,
+    PermissionSerializer, UserManagementSerializer,RolePermissionSerializer,
+    UserDirectorySerializer, BulkRoleAssignmentSerializer, RolePermissionSyncSerializer
 )
-import random
 from drf_yasg import openapi
 
-otp_storage = {}  # Temporary in-memory storage for OTPs
-
 class RegisterView(APIView):
     @swagger_auto_schema(request_body=RegisterSerializer)
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            otp = str(random.randint(100000, 999999))
-            otp_storage[user.email] = {'otp': otp, 'expires_at': now() + timedelta(minutes=3)}
-            send_mail(
-                'Your OTP Code',
-                f'Your OTP is {otp}',
-                'noreply@example.com',
-                [user.email]
-            )
+            with transaction.atomic():
+                user = serializer.save()
+                send_activation_otp(user.email)
             return Response({'message': 'User registered. OTP sent to email.'}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class OTPVerificationView(APIView):
+    throttle_classes = [AuthAttemptThrottle]
+    auth_throttle_scope = 'otp'
+
     @swagger_auto_schema(request_body=OTPVerificationSerializer)
     def post(self, request):
         serializer = OTPVerificationSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data['email']
             otp = serializer.validated_data['otp']
-            if email in otp_storage:
-                if otp_storage[email]['otp'] == otp:
-                    if otp_storage[email]['expires_at'] > now():
+            otp_store = get_otp_store()
+            entry = otp_store.get(email)
+            if entry:
+                if entry['otp'] == otp:
+                    if entry['expires_at'] > now():
                         user = CustomUser.objects.filter(email=email).first()
                         if user:
                             user.is_active = True
                             user.save()
-                            del otp_storage[email]
+                            otp_store.delete(email)
+                            reset_auth_attempts('otp', email)
                             return Response({'message': 'OTP verified. User activated.'}, status=status.HTTP_200_OK)
                         return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-                    del otp_storage[email]  # Remove expired OTP
+                    otp_store.delete(email)  # Remove expired OTP
                     return Response({'error': 'OTP expired.'}, status=status.HTTP_400_BAD_REQUEST)
                 return Response({'error': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
             return Response({'error': 'OTP not found for this email.'}, status=status.HTTP_404_NOT_FOUND)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def login_payload(user, token):
+    return {
+        'token': token.key,
+        'access': issue_access_token(user),
+        'expires_in': settings.ACCESS_TOKEN_TTL,
+    }
+
 class LoginView(APIView):
+    throttle_classes = [AuthAttemptThrottle]
+    auth_throttle_scope = 'login'
+
     @swagger_auto_schema(request_body=LoginSerializer)
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -66,21 +87,49 @@ class LoginView(APIView):
             password = serializer.validated_data['password']
             user = CustomUser.objects.filter(email=email).first()
             if user and user.check_password(password):
+                reset_auth_attempts('login', email)
                 if user.is_active:
-                    token, _ = Token.objects.get_or_create(user=user)
-                    return Response({'token': token.key}, status=status.HTTP_200_OK)
-                otp = str(random.randint(100000, 999999))
-                otp_storage[email] = {'otp': otp, 'expires_at': now() + timedelta(minutes=3)}
-                send_mail(
-                    'Your OTP Code',
-                    f'Your OTP is {otp}',
-                    'noreply@example.com',
-                    [email]
-                )
+                    token = issue_token(user)
+                    return Response(login_payload(user, token), status=status.HTTP_200_OK)
+                if send_activation_otp(email) == OTP_LIMITED:
+                    return Response({'error': 'User not active. Too many OTP requests, try again later.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 return Response({'error': 'User not active. OTP sent to email.'}, status=status.HTTP_403_FORBIDDEN)
             return Response({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class TokenRefreshView(APIView):
+    authentication_classes = []
+
+    @swagger_auto_schema(request_body=TokenRefreshSerializer)
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        if serializer.is_valid():
+            # Goes through the token cache, so expiry and revocation apply as for any request
+            try:
+                user, _ = CachedTokenAuthentication().authenticate_credentials(serializer.validated_data['refresh'])
+            except AuthenticationFailed as e:
+                return Response({'error': e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(
+                {'access': issue_access_token(user), 'expires_in': settings.ACCESS_TOKEN_TTL},
+                status=status.HTTP_200_OK
+            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # Deleting the token also evicts it from the auth cache (see signals);
+        # signed access tokens already handed out lapse within ACCESS_TOKEN_TTL
+        Token.objects.filter(user_id=request.user.pk).delete()
+        return Response({'message': 'Logged out.'}, status=status.HTTP_200_OK)
+
+class AuthCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(auth_cache_stats.as_dict(), status=status.HTTP_200_OK)
+
 class ForgotPasswordView(APIView):
     @swagger_auto_schema(request_body=ForgotPasswordSerializer)
     def post(self, request):
@@ -89,20 +138,22 @@ class ForgotPasswordView(APIView):
             email = serializer.validated_data['email']
             user = CustomUser.objects.filter(email=email).first()
             if user:
-                otp = str(random.randint(100000, 999999))
-                otp_storage[email] = {'otp': otp, 'expires_at': now() + timedelta(minutes=3)}
-                send_mail(
+                result = issue_otp(
+                    email,
                     'Your OTP Code for Password Reset',
-                    f'Your OTP is {otp}. It will expire in 3 minutes.',
-                    'noreply@example.com',
-                    [email]
+                    'Your OTP is {otp}. It will expire in 3 minutes.'
                 )
+                if result == OTP_LIMITED:
+                    return Response({'error': 'Too many OTP requests, try again later.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 return Response({'message': 'OTP sent to email for password reset.'}, status=status.HTTP_200_OK)
             return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class ResetPasswordView(APIView):
+    throttle_classes = [AuthAttemptThrottle]
+    auth_throttle_scope = 'otp'
+
     @swagger_auto_schema(request_body=ResetPasswordSerializer)
     def post(self, request):
         serializer = ResetPasswordSerializer(data=request.data)
@@ -111,17 +162,20 @@ class ResetPasswordView(APIView):
             new_password = serializer.validated_data['new_password']
             otp = serializer.validated_data.get('otp')  # Get OTP from the request
 
-            if email in otp_storage:
-                if otp_storage[email]['otp'] == otp:
-                    if otp_storage[email]['expires_at'] > now():
+            otp_store = get_otp_store()
+            entry = otp_store.get(email)
+            if entry:
+                if entry['otp'] == otp:
+                    if entry['expires_at'] > now():
                         user = CustomUser.objects.filter(email=email).first()
                         if user:
                             user.set_password(new_password)
                             user.save()
-                            del otp_storage[email]  # Remove OTP after successful reset
+                            otp_store.delete(email)  # Remove OTP after successful reset
+                            reset_auth_attempts('otp', email)
                             return Response({'message': 'Password reset successful.'}, status=status.HTTP_200_OK)
                         return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-                    del otp_storage[email]  # Remove expired OTP
+                    otp_store.delete(email)  # Remove expired OTP
                     return Response({'error': 'OTP expired.'}, status=status.HTTP_400_BAD_REQUEST)
                 return Response({'error': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
             return Response({'error': 'OTP not found for this email.'}, status=status.HTTP_404_NOT_FOUND)
@@ -158,11 +212,40 @@ class PermissionView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class UserManagementView(APIView):
-    @swagger_auto_schema(responses={200: UserManagementSerializer(many=True)})
+    max_limit = 200
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Page size (max 200); pages the list by ID instead of returning every user'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Return users after this ID'),
+        ],
+        responses={200: UserManagementSerializer(many=True)}
+    )
     def get(self, request):
-        users = CustomUser.objects.all()
-        serializer = UserManagementSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        users = CustomUser.objects.select_related('role').order_by('id')
+        params = request.query_params
+        # Without limit/cursor the full list is kept for existing clients; the directory endpoint is the paged, searchable one
+        if 'limit' not in params and 'cursor' not in params:
+            serializer = UserManagementSerializer(users, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        try:
+            limit = min(int(params.get('limit', UserDirectoryView.default_limit)), self.max_limit)
+            cursor = int(params['cursor']) if params.get('cursor') else None
+        except ValueError:
+            return Response({'error': 'limit and cursor must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor is not None:
+            users = users.filter(id__gt=cursor)
+        page = list(users[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        return Response({
+            'results': UserManagementSerializer(page, many=True).data,
+            'next_cursor': page[-1].id if has_more else None,
+        }, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(request_body=UserManagementSerializer, responses={201: UserManagementSerializer})
     def post(self, request):
@@ -207,6 +290,117 @@ class UserManagementView(APIView):
         serializer = UserManagementSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+class BulkRoleAssignmentView(APIView):
+    """
+    Change the role of many users at once, either from explicit
+    ``assignments`` or for every user matching ``filter``.
+    """
+    permission_classes = [HasRolePermission]
+    required_permissions = ['assign_roles']
+
+    @swagger_auto_schema(request_body=BulkRoleAssignmentSerializer)
+    def post(self, request):
+        serializer = BulkRoleAssignmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        if 'assignments' in data:
+            results = assign_roles([(item['id'], item['role']) for item in data['assignments']])
+            updated = sum(1 for result in results if result['status'] == 'updated')
+            return Response({'updated': updated, 'results': results}, status=status.HTTP_200_OK)
+
+        filters = {}
+        if 'role' in data['filter']:
+            filters['role_id'] = data['filter']['role']
+        if 'is_active' in data['filter']:
+            filters['is_active'] = data['filter']['is_active']
+        ids = assign_role_by_filter(filters, data['role'])
+        return Response({'updated': len(ids), 'ids': ids}, status=status.HTTP_200_OK)
+
+class UserDirectoryView(APIView):
+    """
+    Searchable user directory with keyset pagination. Pass the returned
+    ``next_cursor`` as ``cursor`` to fetch the following page.
+    """
+    default_limit = 50
+    max_limit = 200
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Search username, email, name and phone'),
+            openapi.Parameter('match', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['contains', 'prefix'], description='Substring (default) or prefix match'),
+            openapi.Parameter('role', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Filter by role ID'),
+            openapi.Parameter('is_active', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Filter by active flag'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Return users after this ID'),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Page size (max 200)'),
+        ],
+        responses={200: UserDirectorySerializer(many=True)}
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', self.default_limit)), self.max_limit)
+            cursor = int(params['cursor']) if params.get('cursor') else None
+            role_id = int(params['role']) if params.get('role') else None
+        except ValueError:
+            return Response({'error': 'limit, cursor and role must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        users = CustomUser.objects.select_related('role').order_by('id')
+        query = params.get('q', '').strip()
+        if query:
+            lookup = 'istartswith' if params.get('match') == 'prefix' else 'icontains'
+            search = Q()
+            for field in DIRECTORY_SEARCH_FIELDS:
+                search |= Q(**{f'{field}__{lookup}': query})
+            users = users.filter(search)
+        if role_id is not None:
+            users = users.filter(role_id=role_id)
+        if params.get('is_active') in ('true', 'false'):
+            users = users.filter(is_active=params['is_active'] == 'true')
+        if cursor is not None:
+            users = users.filter(id__gt=cursor)
+
+        page = list(users[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        serializer = UserDirectorySerializer(page, many=True)
+        return Response({
+            'results': serializer.data,
+            'next_cursor': page[-1].id if has_more else None,
+        }, status=status.HTTP_200_OK)
+
+class UserImportView(APIView):
+    """
+    Bulk import users from an uploaded CSV or NDJSON file.
+    """
+    parser_classes = [MultiPartParser]
+    permission_classes = [HasRolePermission]
+    required_permissions = ['import_users']
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True, description='CSV or NDJSON file of users'),
+            openapi.Parameter('format', openapi.IN_FORM, type=openapi.TYPE_STRING, enum=['csv', 'ndjson'], description='File format (default csv)'),
+        ],
+        consumes=['multipart/form-data'],
+    )
+    def post(self, request):
+        upload = request.FILES.get('file')
+        file_format = request.data.get('format', 'csv')
+        if not upload:
+            return Response({'error': 'A file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'Invalid format. Use "csv" or "ndjson".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = list(UserImporter().run(iter_rows(upload.file, file_format)))
+        summary = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            summary[result['status']] += 1
+        return Response({'summary': summary, 'results': results}, status=status.HTTP_200_OK)
+
 class RolePermissionListView(ListCreateAPIView):
     """
     View to list and assign permissions to a role.
@@ -220,6 +414,22 @@ class RolePermissionListView(ListCreateAPIView):
             return RolePermission.objects.filter(role_id=role_id)
         return super().get_queryset()
 
+class RolePermissionSyncView(APIView):
+    """
+    Replace a role's permissions (or a whole role -> permissions matrix)
+    with the given sets, applying only the difference.
+    """
+    permission_classes = [HasRolePermission]
+    required_permissions = ['manage_role_permissions']
+
+    @swagger_auto_schema(request_body=RolePermissionSyncSerializer)
+    def put(self, request):
+        serializer = RolePermissionSyncSerializer(data=request.data)
+        if serializer.is_valid():
+            results = sync_role_permissions(serializer.validated_data['matrix'])
+            return Response({'results': results}, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 class RolePermissionDeleteView(DestroyAPIView):
     """
     View to remove a permission from a role.
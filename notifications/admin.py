@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import OutboundEmail
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    search_fields = ('subject', 'recipients')
+    list_filter = ('status', 'created_at')
@@ -0,0 +1,133 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils.timezone import now, timedelta
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """
+    Drop-in replacement for ``send_mail`` that writes the message to the
+    outbox instead of talking to SMTP inside the request. The row joins the
+    caller's transaction and a dispatch is kicked once it commits.
+    """
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+    )
+    if settings.EMAIL_OUTBOX_DISPATCH_ON_COMMIT:
+        transaction.on_commit(kick_dispatcher)
+    return email
+
+
+def queue_mass_mail(datatuple):
+    """
+    Outbox counterpart of ``send_mass_mail``: queue every
+    ``(subject, message, from_email, recipient_list)`` with one INSERT.
+    """
+    emails = OutboundEmail.objects.bulk_create(
+        OutboundEmail(subject=subject, body=message, from_email=from_email, recipients=list(recipient_list))
+        for subject, message, from_email, recipient_list in datatuple
+    )
+    if emails and settings.EMAIL_OUTBOX_DISPATCH_ON_COMMIT:
+        transaction.on_commit(kick_dispatcher)
+    return emails
+
+
+def kick_dispatcher():
+    from .tasks import dispatch_email_outbox
+
+    try:
+        dispatch_email_outbox.apply_async(retry=False)
+    except Exception:
+        # The periodic dispatch picks the message up if the broker is down.
+        logger.warning("Could not schedule outbox dispatch.", exc_info=True)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due messages in a short transaction: each
+    attempt is counted and ``next_attempt_at`` is pushed out by
+    EMAIL_OUTBOX_LEASE, so other dispatchers skip them while they are being
+    sent and a crashed dispatcher's messages come back once the lease ends.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='Pending', next_attempt_at__lte=now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        lease_until = now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = lease_until
+        OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def dispatch_pending(batch_size=None):
+    """
+    Send one batch of due messages over a single SMTP connection. The batch
+    is claimed and its outcomes recorded in two short transactions; SMTP
+    runs in between, so a slow server never holds row locks. Failed
+    messages are retried with exponential backoff and dead-lettered after
+    EMAIL_OUTBOX_MAX_ATTEMPTS. Returns (sent, failed).
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+
+    batch = claim_batch(batch_size)
+    if not batch:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        open_error = None
+    except Exception as e:
+        open_error = e
+
+    for email in batch:
+        error = open_error
+        if error is None:
+            try:
+                EmailMessage(
+                    email.subject, email.body, email.from_email, email.recipients,
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                error = e
+
+        if error is None:
+            email.status = 'Sent'
+            email.sent_at = now()
+            email.last_error = ''
+            sent += 1
+            continue
+
+        failed += 1
+        email.last_error = str(error)
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = 'Dead'
+        else:
+            email.next_attempt_at = now() + retry_delay(email.attempts)
+
+    if open_error is None:
+        connection.close()
+
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    return sent, failed
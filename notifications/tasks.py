@@ -0,0 +1,15 @@
+from celery import shared_task
+from django.conf import settings
+from .outbox import dispatch_pending
+
+@shared_task
+def dispatch_email_outbox(batch_size=None):
+    # Drain the outbox batch by batch; whatever is left over waits for the next run.
+    total_sent = total_failed = 0
+    for _ in range(settings.EMAIL_OUTBOX_MAX_BATCHES):
+        sent, failed = dispatch_pending(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            break
+    return {'sent': total_sent, 'failed': total_failed}
@@ -0,0 +1,93 @@
+from unittest import mock
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from .models import OutboundEmail
+from .outbox import queue_mail, queue_mass_mail, dispatch_pending
+from .tasks import dispatch_email_outbox
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTests(TestCase):
+    def queue(self, count=1):
+        for i in range(count):
+            queue_mail('Subject', f'Body {i}', 'noreply@example.com', [f'user{i}@example.com'])
+
+    def test_queue_mail_does_not_send(self):
+        """Test that queueing only writes a pending outbox row"""
+        self.queue()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, 'Pending')
+
+    def test_queue_mass_mail_single_insert(self):
+        """Test that many messages are queued with one insert"""
+        with self.assertNumQueries(1):
+            queue_mass_mail(('Subject', f'Body {i}', 'noreply@example.com', [f'user{i}@example.com']) for i in range(20))
+        self.assertEqual(OutboundEmail.objects.filter(status='Pending').count(), 20)
+
+    def test_dispatch_sends_batch(self):
+        """Test that a dispatch delivers every due message and marks it sent"""
+        self.queue(3)
+        result = dispatch_email_outbox()
+        self.assertEqual(result, {'sent': 3, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status='Sent').count(), 3)
+
+    def test_dispatch_respects_batch_size(self):
+        """Test that a single batch is bounded"""
+        self.queue(3)
+        self.assertEqual(dispatch_pending(batch_size=2), (2, 0))
+        self.assertEqual(OutboundEmail.objects.filter(status='Pending').count(), 1)
+
+    def test_failed_send_is_retried_then_dead_lettered(self):
+        """Test retry backoff and dead-lettering of failing messages"""
+        self.queue()
+        with mock.patch('notifications.outbox.EmailMessage.send', side_effect=OSError('boom')):
+            self.assertEqual(dispatch_pending(), (0, 1))
+            email = OutboundEmail.objects.get()
+            self.assertEqual(email.status, 'Pending')
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+            # Not due yet, so nothing is picked up
+            self.assertEqual(dispatch_pending(), (0, 0))
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(dispatch_pending(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'Dead')
+        self.assertEqual(email.last_error, 'boom')
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_smtp_runs_outside_transaction(self):
+        """Test that messages are sent with no transaction or row locks held"""
+        self.queue(2)
+        # TestCase wraps each test in atomic blocks; anything deeper belongs to the dispatcher
+        baseline = len(connection.savepoint_ids)
+        depths = []
+
+        def send(message, *args, **kwargs):
+            depths.append(len(connection.savepoint_ids))
+            return 1
+
+        with mock.patch('notifications.outbox.EmailMessage.send', autospec=True, side_effect=send):
+            self.assertEqual(dispatch_pending(), (2, 0))
+        self.assertEqual(depths, [baseline, baseline])
+
+    def test_claimed_messages_are_leased(self):
+        """Test that a claimed message is hidden from other dispatchers until its lease ends"""
+        self.queue()
+
+        def send_and_race(message, *args, **kwargs):
+            # A second dispatcher running mid-send finds nothing due
+            self.assertEqual(dispatch_pending(), (0, 0))
+            return 1
+
+        with mock.patch('notifications.outbox.EmailMessage.send', autospec=True, side_effect=send_and_race):
+            self.assertEqual(dispatch_pending(), (1, 0))
+        self.assertEqual(OutboundEmail.objects.get().attempts, 1)
@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Project, ProjectTeamMember, Milestone, Task
+from django.contrib import admin, messages
+from .models import Project, ProjectTeamMember, Milestone, Task, DeadlineAlert
+from .transitions import transition_tasks
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
@@ -23,4 +24,35 @@ class MilestoneAdmin(admin.ModelAdmin):
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'project', 'assignee', 'priority', 'status', 'due_date')
     search_fields = ('title', 'project__name', 'assignee__email')
-    list_filter = ('priority', 'status', 'due_date')
\ No newline at end of file
+    list_filter = ('priority', 'status', 'due_date')
+    actions = ['mark_not_started', 'mark_in_progress', 'mark_completed']
+
+    def transition(self, request, queryset, status):
+        results = transition_tasks([(task_id, status) for task_id in queryset.values_list('id', flat=True)])
+        blocked = [result['id'] for result in results if result['status'] == 'blocked']
+        updated = sum(1 for result in results if result['status'] == 'updated')
+        self.message_user(request, f"{updated} task(s) marked {status}.", messages.SUCCESS)
+        if blocked:
+            self.message_user(
+                request, f"{len(blocked)} task(s) skipped because their dependency is not completed: {blocked}",
+                messages.WARNING
+            )
+
+    @admin.action(description='Mark selected tasks as Not Started')
+    def mark_not_started(self, request, queryset):
+        self.transition(request, queryset, 'Not Started')
+
+    @admin.action(description='Mark selected tasks as In Progress')
+    def mark_in_progress(self, request, queryset):
+        self.transition(request, queryset, 'In Progress')
+
+    @admin.action(description='Mark selected tasks as Completed')
+    def mark_completed(self, request, queryset):
+        self.transition(request, queryset, 'Completed')
+
+
+@admin.register(DeadlineAlert)
+class DeadlineAlertAdmin(admin.ModelAdmin):
+    list_display = ('task', 'kind', 'due_date', 'sent_at')
+    search_fields = ('task__title',)
+    list_filter = ('kind', 'sent_at')
@@ -0,0 +1,251 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from authflow.models import CustomUser
+from notifications.outbox import queue_mass_mail
+from .deadline_alerts import add_reminders, schedule_reminders
+from .dependency_graph import COMPLETED, DependencyGraph
+from .models import Project, Task
+from .scheduling import invalidate_schedules
+
+REQUIRED_ON_CREATE = ('project', 'title', 'description', 'assignee', 'priority', 'due_date')
+UPDATABLE_FIELDS = ('title', 'description', 'assignee', 'priority', 'due_date', 'status', 'dependency', 'estimated_days')
+
+
+class TaskReferenceField(serializers.Field):
+    """An existing task id, or the ``temp_id`` of a task created earlier in the same batch."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+        if isinstance(data, str) and data:
+            return data
+        raise serializers.ValidationError('Expected a task id or a temp_id.')
+
+    def to_representation(self, value):
+        return value
+
+
+class BulkTaskItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    temp_id = serializers.CharField(max_length=64, required=False)
+    project = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    due_date = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    dependency = TaskReferenceField(required=False, allow_null=True)
+    estimated_days = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if 'id' in attrs:
+            if 'temp_id' in attrs:
+                raise serializers.ValidationError('Updates are addressed by id; temp_id is only for new tasks.')
+            if 'project' in attrs:
+                raise serializers.ValidationError({'project': 'Tasks cannot be moved between projects in bulk.'})
+        else:
+            missing = {field: 'This field is required.' for field in REQUIRED_ON_CREATE if field not in attrs}
+            if missing:
+                raise serializers.ValidationError(missing)
+        return attrs
+
+
+class BulkTaskSerializer(serializers.Serializer):
+    tasks = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_tasks(self, value):
+        # Read per request rather than at import, so changes to the setting take effect
+        limit = settings.TASK_BULK_MAX_ITEMS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Ensure this field has no more than {limit} elements.")
+        return value
+
+
+class TaskBatch:
+    """
+    Validates a batch of task creates (no ``id``) and updates (with ``id``)
+    set-wise and writes it with ``bulk_create``/``bulk_update``.
+
+    Referenced tasks, projects and assignees are fetched once up front; the
+    rules of ``Task.clean`` (choices, completed dependency in the same
+    project, no cycles) are then checked in memory in batch order, so a
+    ``temp_id`` must be defined before it is used as a dependency. The batch
+    is all or nothing: ``apply`` returns ``(results, errors)`` and writes
+    only when ``errors`` is empty.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.errors = {}
+
+    def error(self, index, errors):
+        self.errors.setdefault(index, {}).update(errors)
+
+    def parse(self):
+        parsed = []
+        seen_ids, seen_temp_ids = set(), set()
+        for index, item in enumerate(self.items):
+            serializer = BulkTaskItemSerializer(data=item)
+            if not serializer.is_valid():
+                self.error(index, serializer.errors)
+                continue
+            data = serializer.validated_data
+            if 'id' in data:
+                if data['id'] in seen_ids:
+                    self.error(index, {'id': ['Task appears more than once in the batch.']})
+                    continue
+                seen_ids.add(data['id'])
+            elif 'temp_id' in data:
+                if data['temp_id'] in seen_temp_ids:
+                    self.error(index, {'temp_id': ['Duplicate temp_id.']})
+                    continue
+                seen_temp_ids.add(data['temp_id'])
+            parsed.append((index, data))
+        return parsed
+
+    def prefetch(self, parsed):
+        update_ids = {data['id'] for _, data in parsed if 'id' in data}
+        referenced = {data['dependency'] for _, data in parsed if isinstance(data.get('dependency'), int)}
+        tasks = {task.id: task for task in Task.objects.select_for_update().filter(id__in=update_ids | referenced)}
+        # Dependencies the updated tasks keep must still be completed
+        kept = {task.dependency_id for task in tasks.values() if task.dependency_id} - set(tasks)
+        if kept:
+            tasks.update((task.id, task) for task in Task.objects.filter(id__in=kept))
+        project_ids = {data['project'] for _, data in parsed if 'project' in data}
+        assignee_ids = {data['assignee'] for _, data in parsed if data.get('assignee') is not None}
+        self.tasks = tasks
+        self.projects = set(Project.objects.filter(id__in=project_ids).values_list('id', flat=True))
+        self.assignees = dict(CustomUser.objects.filter(id__in=assignee_ids).values_list('id', 'email'))
+
+    def check(self, parsed):
+        status_of = {task_id: task.status for task_id, task in self.tasks.items()}
+        project_of = {task_id: task.project_id for task_id, task in self.tasks.items()}
+        graphs, edges = {}, []
+        accepted = []
+        for index, data in parsed:
+            task = self.tasks.get(data.get('id'))
+            if 'id' in data and task is None:
+                self.error(index, {'id': ['Task not found.']})
+                continue
+            if 'project' in data and data['project'] not in self.projects:
+                self.error(index, {'project': ['Project not found.']})
+                continue
+            if data.get('assignee') is not None and data['assignee'] not in self.assignees:
+                self.error(index, {'assignee': ['User not found.']})
+                continue
+
+            key = data['id'] if task else data.get('temp_id', ('new', index))
+            project_id = task.project_id if task else data['project']
+            task_status = data.get('status', task.status if task else 'Not Started')
+            dependency = data['dependency'] if 'dependency' in data else (task.dependency_id if task else None)
+
+            if dependency is not None:
+                if dependency not in status_of:
+                    message = 'Task not found.' if isinstance(dependency, int) else 'Unknown temp_id; define it earlier in the batch.'
+                    self.error(index, {'dependency': [message]})
+                    continue
+                if project_of[dependency] != project_id:
+                    self.error(index, {'dependency': ['Dependency must belong to the same project.']})
+                    continue
+                if status_of[dependency] != COMPLETED:
+                    self.error(index, {'dependency': ['Dependency is not completed.']})
+                    continue
+            if task and 'dependency' in data and dependency is not None:
+                if project_id not in graphs:
+                    graphs[project_id] = DependencyGraph.for_project(project_id)
+                    for edge_project, node, parent in edges:
+                        if edge_project == project_id:
+                            graphs[project_id].set_dependencies(node, [parent])
+                if graphs[project_id].would_create_cycle(key, [dependency]):
+                    self.error(index, {'dependency': ['Dependency would create a cycle.']})
+                    continue
+
+            if 'dependency' in data:
+                edges.append((project_id, key, dependency))
+                if project_id in graphs:
+                    graphs[project_id].set_dependencies(key, [dependency])
+            status_of[key] = task_status
+            project_of[key] = project_id
+            accepted.append((index, data, task))
+        return accepted
+
+    def write(self, accepted):
+        created, created_ids = [], {}
+        for index, data, task in accepted:
+            if task is None:
+                fields = {f: v for f, v in data.items() if f in UPDATABLE_FIELDS and f not in ('assignee', 'dependency')}
+                dependency = data.get('dependency')
+                created.append((index, data, Task(
+                    project_id=data['project'],
+                    assignee_id=data['assignee'],
+                    dependency_id=dependency if isinstance(dependency, int) else None,
+                    **fields
+                )))
+        Task.objects.bulk_create([new for _, _, new in created])
+        for index, data, new in created:
+            created_ids[data.get('temp_id', ('new', index))] = new.pk
+
+        # Intra-batch dependencies can only be linked once the rows have ids
+        linked = []
+        for _, data, new in created:
+            if isinstance(data.get('dependency'), str):
+                new.dependency_id = created_ids[data['dependency']]
+                linked.append(new)
+        if linked:
+            Task.objects.bulk_update(linked, ['dependency'])
+
+        updated, update_fields = [], set()
+        for _, data, task in accepted:
+            if task is None:
+                continue
+            for field in UPDATABLE_FIELDS:
+                if field not in data:
+                    continue
+                value = data[field]
+                if field == 'dependency':
+                    task.dependency_id = created_ids[value] if isinstance(value, str) else value
+                elif field == 'assignee':
+                    task.assignee_id = value
+                else:
+                    setattr(task, field, value)
+                update_fields.add(field)
+            updated.append(task)
+        if updated and update_fields:
+            Task.objects.bulk_update(updated, sorted(update_fields))
+
+        # bulk_create/bulk_update skip the post_save signal that keeps reminders in step
+        add_reminders(new for _, _, new in created)
+        reminder_fields = {'due_date', 'status', 'assignee'}
+        schedule_reminders(task.pk for _, data, task in accepted if task is not None and reminder_fields & set(data))
+        project_ids = {new.project_id for _, _, new in created} | {task.project_id for task in updated}
+        transaction.on_commit(partial(invalidate_schedules, project_ids))
+        queue_mass_mail(
+            ('New Task Assigned', f"You have been assigned a new task: {new.title}", 'noreply@example.com', [self.assignees[new.assignee_id]])
+            for _, _, new in created if new.assignee_id is not None
+        )
+
+        results = []
+        created_by_index = {index: new for index, _, new in created}
+        for index, data, task in accepted:
+            if task is None:
+                result = {'index': index, 'id': created_by_index[index].pk, 'status': 'created'}
+                if 'temp_id' in data:
+                    result['temp_id'] = data['temp_id']
+            else:
+                result = {'index': index, 'id': task.pk, 'status': 'updated'}
+            results.append(result)
+        return results
+
+    def apply(self):
+        with transaction.atomic():
+            parsed = self.parse()
+            self.prefetch(parsed)
+            accepted = self.check(parsed)
+            if self.errors:
+                return [], [{'index': index, 'errors': self.errors[index]} for index in sorted(self.errors)]
+            return self.write(accepted), []
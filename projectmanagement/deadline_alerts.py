@@ -0,0 +1,180 @@
+import logging
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from notifications.outbox import queue_mass_mail
+from .models import DeadlineAlert, Task, TaskReminder
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('Not Started', 'In Progress')
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def build_reminders(rows):
+    """
+    Reminders for open, assigned ``(task id, due date)`` rows: an
+    ``upcoming`` one DEADLINE_ALERT_LEAD_DAYS before the due date (unless it
+    has passed) and an ``overdue`` one the day after.
+    """
+    today = timezone.localdate()
+    lead = timedelta(days=settings.DEADLINE_ALERT_LEAD_DAYS)
+    reminders = []
+    for task_id, due_date in rows:
+        if due_date >= today:
+            reminders.append(TaskReminder(task_id=task_id, kind='upcoming', due_date=due_date, remind_at=start_of(due_date - lead)))
+        reminders.append(TaskReminder(task_id=task_id, kind='overdue', due_date=due_date, remind_at=start_of(due_date + timedelta(days=1))))
+    return reminders
+
+
+def add_reminders(tasks):
+    """Schedule reminders for newly created ``tasks``, which have none to replace yet."""
+    rows = [(task.pk, task.due_date) for task in tasks if task.status in OPEN_STATUSES and task.assignee_id]
+    TaskReminder.objects.bulk_create(build_reminders(rows))
+
+
+def schedule_reminders(task_ids):
+    """
+    Replace the reminders of ``task_ids`` with ones for their current due
+    date, status and assignee; completed or unassigned tasks just lose
+    theirs. Costs a DELETE, a SELECT and one INSERT however many tasks are
+    given.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    TaskReminder.objects.filter(task_id__in=task_ids).delete()
+    tasks = Task.objects.filter(id__in=task_ids, status__in=OPEN_STATUSES, assignee__isnull=False)
+    TaskReminder.objects.bulk_create(build_reminders(tasks.values_list('id', 'due_date')))
+
+
+def due_reminders(now):
+    return TaskReminder.objects.filter(remind_at__lte=now)
+
+
+def pending_alerts(now):
+    """
+    Reminders due by ``now`` with their task, assignee and project joined in
+    and ``already_sent`` marking those the ledger has recorded, ordered by
+    assignee so digests can be built from a single stream. Found through
+    the ``remind_at`` index, so the cost follows the due reminders, not the
+    size of the task table.
+    """
+    sent = DeadlineAlert.objects.filter(task=OuterRef('task_id'), kind=OuterRef('kind'), due_date=OuterRef('due_date'))
+    return (
+        due_reminders(now)
+        .annotate(already_sent=Exists(sent))
+        .select_related('task__assignee', 'task__project')
+        .only(
+            'kind', 'due_date', 'task', 'task__title', 'task__due_date', 'task__status',
+            'task__assignee', 'task__project', 'task__assignee__email', 'task__project__name'
+        )
+        .order_by('task__assignee_id', 'task__due_date', 'task_id')
+    )
+
+
+def is_stale(reminder):
+    # Reminders are rescheduled when a task changes, but bulk writes and user deletions can still leave old ones
+    task = reminder.task
+    return (
+        reminder.already_sent or task.status not in OPEN_STATUSES
+        or task.assignee_id is None or task.due_date != reminder.due_date
+    )
+
+
+def build_digest(reminders):
+    overdue = [reminder.task for reminder in reminders if reminder.kind == 'overdue']
+    upcoming = [reminder.task for reminder in reminders if reminder.kind == 'upcoming']
+    sections = []
+    if overdue:
+        sections.append('Overdue:\n' + '\n'.join(
+            f"- {task.title} ({task.project.name}), due {task.due_date}" for task in overdue
+        ))
+    if upcoming:
+        sections.append('Due soon:\n' + '\n'.join(
+            f"- {task.title} ({task.project.name}), due {task.due_date}" for task in upcoming
+        ))
+    subject = f"Task deadlines: {len(overdue)} overdue, {len(upcoming)} due soon"
+    return subject, '\n\n'.join(sections), 'noreply@example.com', [reminders[0].task.assignee.email]
+
+
+def drop_unassigned_reminders(now):
+    """Delete due reminders whose task has lost its assignee; no assignee shard would ever pick them up."""
+    return due_reminders(now).filter(task__assignee__isnull=True).delete()[0]
+
+
+def plan_shards(now, shards=None):
+    """
+    Split the assignees of the due reminders into at most ``shards``
+    contiguous ``[start, end)`` assignee id ranges. Sharding by assignee
+    keeps every digest inside one shard.
+    """
+    shards = shards or settings.DEADLINE_ALERT_SHARDS
+    bounds = due_reminders(now).aggregate(low=Min('task__assignee_id'), high=Max('task__assignee_id'))
+    if bounds['low'] is None:
+        return []
+    end = bounds['high'] + 1
+    size = -(-(end - bounds['low']) // shards)
+    return [(start, min(start + size, end)) for start in range(bounds['low'], end, size)]
+
+
+def send_deadline_digests(now=None, assignee_range=None, chunk_size=None):
+    """
+    Queue one digest per assignee for every due reminder, record each alert
+    in the ledger so it is never sent again, and delete the reminders that
+    fired or went stale.
+
+    ``assignee_range`` limits the run to one ``plan_shards`` range. The
+    reminders are read with one query, streamed ``chunk_size`` rows at a
+    time; every chunk of digests is queued with one outbox INSERT, which the
+    dispatcher sends over a single SMTP connection, in the same transaction
+    as its ledger rows. If another run recorded some of those alerts first,
+    the chunk is dropped and its reminders are cleared as already sent on
+    the next run. Returns ``{'alerts', 'digests', 'skipped'}`` counts.
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or settings.DEADLINE_ALERT_CHUNK_SIZE
+    candidates = pending_alerts(now)
+    if assignee_range is not None:
+        candidates = candidates.filter(task__assignee_id__gte=assignee_range[0], task__assignee_id__lt=assignee_range[1])
+
+    counts = {'alerts': 0, 'digests': 0, 'skipped': 0}
+    mails, ledger, done = [], [], []
+
+    def flush():
+        try:
+            with transaction.atomic():
+                DeadlineAlert.objects.bulk_create(ledger)
+                queue_mass_mail(mails)
+                TaskReminder.objects.filter(pk__in=done).delete()
+        except IntegrityError:
+            logger.info("Skipped %d deadline alerts already recorded by another run.", len(ledger))
+            counts['skipped'] += len(ledger)
+        else:
+            counts['alerts'] += len(ledger)
+            counts['digests'] += len(mails)
+        mails.clear()
+        ledger.clear()
+        done.clear()
+
+    rows = candidates.iterator(chunk_size=chunk_size)
+    for _, group in groupby(rows, key=lambda reminder: reminder.task.assignee_id):
+        group = list(group)
+        done.extend(reminder.pk for reminder in group)
+        live = [reminder for reminder in group if not is_stale(reminder)]
+        if live:
+            mails.append(build_digest(live))
+            ledger.extend(DeadlineAlert(task_id=r.task_id, kind=r.kind, due_date=r.due_date) for r in live)
+        if len(done) >= chunk_size:
+            flush()
+    if done:
+        flush()
+    return counts
@@ -0,0 +1,149 @@
+from collections import deque
+
+from django.db import connection
+
+from .models import Task
+
+COMPLETED = 'Completed'
+
+
+def closes_cycle(task_id, dependency_id):
+    """
+    True if making ``task_id`` depend on ``dependency_id`` closes a loop.
+
+    A task has a single dependency, so this only follows the chain up from
+    ``dependency_id`` with one recursive query, stopping at ``task_id`` or
+    the top of the chain; the rest of the project is never read. ``UNION``
+    (not ``UNION ALL``) ends the walk even if the stored chain already loops.
+    Whole-graph checks for batches belong to ``DependencyGraph``.
+    """
+    if task_id == dependency_id:
+        return True
+    qn = connection.ops.quote_name
+    table = qn(Task._meta.db_table)
+    id_col, dep_col = qn('id'), qn(Task._meta.get_field('dependency').column)
+    sql = (
+        f"WITH RECURSIVE chain (id, dependency_id) AS ("
+        f" SELECT {id_col}, {dep_col} FROM {table} WHERE {id_col} = %s"
+        f" UNION"
+        f" SELECT t.{id_col}, t.{dep_col} FROM {table} t JOIN chain ON t.{id_col} = chain.dependency_id"
+        f" WHERE chain.id <> %s"
+        f") SELECT 1 FROM chain WHERE id = %s LIMIT 1"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [dependency_id, task_id, task_id])
+        return cursor.fetchone() is not None
+
+
+class DependencyGraph:
+    """
+    In-memory dependency graph of one project's tasks.
+
+    ``parents`` maps a task id to the ids it depends on and ``children`` the
+    reverse, so every query after the initial load is a walk over plain
+    dicts. Edges come from ``load_rows``; a many-to-many dependency table
+    only needs a different ``load_rows`` yielding ``(id, status, dep_ids)``.
+    """
+
+    def __init__(self, rows):
+        self.statuses = {}
+        self.parents = {}
+        self.children = {}
+        for task_id, task_status, dependency_ids in rows:
+            self.statuses[task_id] = task_status
+            dependency_ids = [d for d in dependency_ids if d is not None]
+            if dependency_ids:
+                self.parents[task_id] = dependency_ids
+                for dependency_id in dependency_ids:
+                    self.children.setdefault(dependency_id, []).append(task_id)
+
+    @classmethod
+    def load_rows(cls, project_id):
+        rows = Task.objects.filter(project_id=project_id).values_list('id', 'status', 'dependency_id')
+        for task_id, task_status, dependency_id in rows.iterator(chunk_size=5000):
+            yield task_id, task_status, (dependency_id,)
+
+    @classmethod
+    def for_project(cls, project_id):
+        """Build the graph from a single query over the project's tasks."""
+        return cls(cls.load_rows(project_id))
+
+    def __contains__(self, task_id):
+        return task_id in self.statuses
+
+    def __len__(self):
+        return len(self.statuses)
+
+    def _walk(self, start_ids, edges):
+        seen = set()
+        stack = list(start_ids)
+        while stack:
+            node = stack.pop()
+            for nxt in edges.get(node, ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def ancestors(self, task_id):
+        """Every task ``task_id`` depends on, directly or transitively."""
+        return self._walk([task_id], self.parents)
+
+    def descendants(self, task_id):
+        """Every task that depends on ``task_id``, directly or transitively."""
+        return self._walk([task_id], self.children)
+
+    def blockers(self, task_id):
+        """Direct dependencies of ``task_id`` that are not completed yet."""
+        return [d for d in self.parents.get(task_id, ()) if self.statuses.get(d) != COMPLETED]
+
+    def is_unblocked(self, task_id):
+        return not self.blockers(task_id)
+
+    def unblocked_tasks(self):
+        """Open tasks whose dependencies are all completed."""
+        return [
+            task_id for task_id, task_status in self.statuses.items()
+            if task_status != COMPLETED and self.is_unblocked(task_id)
+        ]
+
+    def would_create_cycle(self, task_id, dependency_ids):
+        """True if making ``task_id`` depend on ``dependency_ids`` closes a loop."""
+        dependency_ids = set(d for d in dependency_ids if d is not None)
+        if task_id in dependency_ids:
+            return True
+        return not dependency_ids.isdisjoint(self.descendants(task_id))
+
+    def set_dependencies(self, task_id, dependency_ids, task_status=None):
+        """Apply an edge change in memory, e.g. while validating a batch."""
+        for old in self.parents.pop(task_id, ()):
+            self.children[old].remove(task_id)
+        dependency_ids = [d for d in dependency_ids if d is not None]
+        if dependency_ids:
+            self.parents[task_id] = dependency_ids
+            for dependency_id in dependency_ids:
+                self.children.setdefault(dependency_id, []).append(task_id)
+        if task_status is not None or task_id not in self.statuses:
+            self.statuses[task_id] = task_status
+
+    def topological_order(self):
+        """
+        Task ids with every dependency before its dependents (Kahn's
+        algorithm). Raises ValueError naming the tasks left on a cycle.
+        """
+        indegree = {task_id: 0 for task_id in self.statuses}
+        for task_id, dependency_ids in self.parents.items():
+            indegree[task_id] = sum(1 for d in dependency_ids if d in self.statuses)
+        queue = deque(task_id for task_id, degree in indegree.items() if degree == 0)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in self.children.get(node, ()):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        if len(order) != len(indegree):
+            remaining = sorted(task_id for task_id, degree in indegree.items() if degree > 0)
+            raise ValueError(f"Dependency cycle between tasks {remaining}")
+        return order
@@ -0,0 +1,50 @@
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    ``many=True`` counterpart of ``BulkPrimaryKeyRelatedField``: resolves the
+    whole list with a single ``pk__in`` query instead of one ``get()`` per
+    item, and reports every missing pk in one error.
+    """
+    default_error_messages = dict(
+        serializers.ManyRelatedField.default_error_messages,
+        does_not_exist='Invalid pk(s) {pk_values} - object(s) do not exist.',
+        incorrect_type='Incorrect type. Expected a list of pk values.',
+    )
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        queryset = self.child_relation.get_queryset()
+        pk_field = self.child_relation.pk_field
+        to_python = pk_field.to_internal_value if pk_field else queryset.model._meta.pk.to_python
+        if any(isinstance(item, (bool, dict, list)) for item in data):
+            self.fail('incorrect_type')
+        try:
+            pks = [to_python(item) for item in data]
+        except (TypeError, ValueError, ValidationError, serializers.ValidationError):
+            self.fail('incorrect_type')
+
+        found = {obj.pk: obj for obj in queryset.filter(pk__in=set(pks))}
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in found]
+        if missing:
+            self.fail('does_not_exist', pk_values=missing)
+        return [found[pk] for pk in dict.fromkeys(pks)]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Drop-in ``PrimaryKeyRelatedField`` whose ``many=True`` form validates in one query."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
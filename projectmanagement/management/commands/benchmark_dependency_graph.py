@@ -0,0 +1,84 @@
+import random
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authflow.models import CustomUser
+from projectmanagement.dependency_graph import DependencyGraph
+from projectmanagement.models import Project, Task
+from projectmanagement.scheduling import critical_path_analysis
+
+
+class Command(BaseCommand):
+    help = "Compare per-hop dependency queries with the in-memory dependency graph on a large project."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['tasks']
+        # Everything is created inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(
+                username='benchmark-user', email='benchmark@example.com', phone_number='benchmark',
+            )
+            project = Project.objects.create(
+                name='benchmark', description='', start_date=date.today(), end_date=date.today(),
+            )
+            # bulk_create skips Task.save, so the rows go in without per-row validation
+            tasks = Task.objects.bulk_create(
+                (Task(project=project, title=f'task {i}', description='', assignee=user,
+                      priority='Low', due_date=date.today(), status='Completed') for i in range(count)),
+                batch_size=5000,
+            )
+            # Each task depends on a random earlier one: a forest with long chains
+            for i, task in enumerate(tasks[1:], start=1):
+                task.dependency_id = tasks[rng.randrange(max(0, i - 50), i)].pk
+            Task.objects.bulk_update(tasks[1:], ['dependency'], batch_size=5000)
+            sample = [rng.choice(tasks) for _ in range(options['queries'])]
+
+            start = time.perf_counter()
+            hops = 0
+            for task in sample:
+                dependency_id = task.dependency_id
+                while dependency_id is not None:
+                    dependency_id = Task.objects.filter(pk=dependency_id).values_list('dependency_id', flat=True)[0]
+                    hops += 1
+            per_hop_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            graph = DependencyGraph.for_project(project.pk)
+            load_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for task in sample:
+                graph.ancestors(task.pk)
+            ancestors_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for task in sample:
+                graph.would_create_cycle(task.pk, [tasks[-1].pk])
+            cycle_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            graph.topological_order()
+            unblocked = len(graph.unblocked_tasks())
+            full_pass_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            critical_path = critical_path_analysis(project)['critical_path']
+            cpm_elapsed = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        queries = len(sample)
+        self.stdout.write(f"tasks: {count}, sampled: {queries}, average chain length: {hops / queries:.0f}")
+        self.stdout.write(f"per-hop queries:     {per_hop_elapsed / queries * 1e3:.2f} ms/ancestor walk")
+        self.stdout.write(f"graph load:          {load_elapsed * 1e3:.0f} ms (one query)")
+        self.stdout.write(f"graph ancestors:     {ancestors_elapsed / queries * 1e3:.3f} ms/walk")
+        self.stdout.write(f"graph cycle check:   {cycle_elapsed / queries * 1e3:.3f} ms/check")
+        self.stdout.write(f"topological order + unblocked scan: {full_pass_elapsed * 1e3:.0f} ms ({unblocked} unblocked)")
+        self.stdout.write(f"critical path analysis: {cpm_elapsed * 1e3:.0f} ms (path of {len(critical_path)} tasks)")
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from authflow.models import CustomUser, Role
+from .models import ProjectTeamMember
+
+
+class MembershipError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def apply_membership_changes(project, add=(), remove=(), update=()):
+    """
+    Apply adds (``(user id, role id)``), removes (user ids) and role updates
+    (``(user id, role id)``) to a project's team. The changes are diffed
+    against the current ``ProjectTeamMember`` rows and written with one
+    ``bulk_create``, one DELETE and one UPDATE per target role, all in one
+    transaction. Only ids are read, never user objects.
+
+    Adding an existing member or removing a non-member is a no-op; roles of
+    existing members only change through ``update``. Unknown users or roles,
+    or updates to non-members, raise ``MembershipError`` and nothing is
+    written.
+    """
+    add, update = dict(add), dict(update)
+    remove = set(remove)
+    with transaction.atomic():
+        current = dict(
+            ProjectTeamMember.objects.select_for_update()
+            .filter(project=project)
+            .values_list('user_id', 'role_id')
+        )
+
+        errors = {}
+        new_user_ids = set(add) - set(current)
+        known_users = set(CustomUser.objects.filter(id__in=new_user_ids).values_list('id', flat=True))
+        if new_user_ids - known_users:
+            errors['add'] = [f"Users not found: {sorted(new_user_ids - known_users)}"]
+        not_members = set(update) - set(current)
+        if not_members:
+            errors['update'] = [f"Users are not members of this project: {sorted(not_members)}"]
+        role_ids = {role_id for role_id in [*add.values(), *update.values()] if role_id is not None}
+        unknown_roles = role_ids - set(Role.objects.filter(id__in=role_ids).values_list('id', flat=True))
+        if unknown_roles:
+            errors['role'] = [f"Roles not found: {sorted(unknown_roles)}"]
+        if errors:
+            raise MembershipError(errors)
+
+        added = sorted(new_user_ids)
+        removed = sorted(remove & set(current))
+        changed = defaultdict(list)
+        for user_id, role_id in update.items():
+            if current[user_id] != role_id:
+                changed[role_id].append(user_id)
+
+        if added:
+            ProjectTeamMember.objects.bulk_create(
+                ProjectTeamMember(project=project, user_id=user_id, role_id=add[user_id]) for user_id in added
+            )
+        if removed:
+            ProjectTeamMember.objects.filter(project=project, user_id__in=removed).delete()
+        for role_id, user_ids in changed.items():
+            ProjectTeamMember.objects.filter(project=project, user_id__in=user_ids).update(role_id=role_id)
+
+    return {
+        'added': added,
+        'removed': removed,
+        'updated': sorted(user_id for user_ids in changed.values() for user_id in user_ids),
+    }
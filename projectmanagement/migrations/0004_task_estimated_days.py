@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projectmanagement', '0003_alter_task_priority_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='estimated_days',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projectmanagement', '0005_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadlineAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('upcoming', 'Upcoming'), ('overdue', 'Overdue')], max_length=10)),
+                ('due_date', models.DateField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deadline_alerts', to='projectmanagement.task')),
+            ],
+            options={
+                'unique_together': {('task', 'kind', 'due_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:53
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def schedule_existing_tasks(apps, schema_editor):
+    # Same rules as deadline_alerts.build_reminders, for the tasks that exist before reminders did
+    Task = apps.get_model('projectmanagement', 'Task')
+    TaskReminder = apps.get_model('projectmanagement', 'TaskReminder')
+    today = timezone.localdate()
+    lead = timedelta(days=settings.DEADLINE_ALERT_LEAD_DAYS)
+    tasks = Task.objects.filter(status__in=['Not Started', 'In Progress'], assignee__isnull=False)
+    batch = []
+    for task_id, due_date in tasks.values_list('id', 'due_date').iterator(chunk_size=2000):
+        if due_date >= today:
+            batch.append(TaskReminder(task_id=task_id, kind='upcoming', due_date=due_date,
+                                      remind_at=timezone.make_aware(datetime.combine(due_date - lead, time.min))))
+        batch.append(TaskReminder(task_id=task_id, kind='overdue', due_date=due_date,
+                                  remind_at=timezone.make_aware(datetime.combine(due_date + timedelta(days=1), time.min))))
+        if len(batch) >= 2000:
+            TaskReminder.objects.bulk_create(batch)
+            batch = []
+    TaskReminder.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projectmanagement', '0006_deadlinealert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('upcoming', 'Upcoming'), ('overdue', 'Overdue')], max_length=10)),
+                ('due_date', models.DateField()),
+                ('remind_at', models.DateTimeField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='projectmanagement.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['remind_at'], name='task_reminder_due_idx')],
+                'unique_together': {('task', 'kind')},
+            },
+        ),
+        migrations.RunPython(schedule_existing_tasks, migrations.RunPython.noop),
+    ]
@@ -48,15 +48,34 @@ class Task(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
     title = models.CharField(max_length=255)
     description = models.TextField()
-    assignee = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='tasks')
+    assignee = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
     priority = models.CharField(max_length=6, choices=PRIORITY_CHOICES)
     due_date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Not Started')
     dependency = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='dependent_tasks')
+    estimated_days = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        # Match the filter combinations of the task list endpoint
+        indexes = [
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['due_date'], name='task_due_date_idx'),
+        ]
 
     def clean(self):
         if self.dependency and self.dependency.status != 'Completed':
             raise ValidationError(f"Task '{self.title}' cannot start until its dependency '{self.dependency.title}' is completed.")
+
+        if self.dependency and self.dependency.project_id != self.project_id:
+            raise ValidationError(f"Task '{self.title}' can only depend on tasks of the same project.")
+
+        # A new task has no dependents yet, so only updates can close a loop
+        if self.dependency_id and self.pk:
+            from .dependency_graph import closes_cycle
+            if closes_cycle(self.pk, self.dependency_id):
+                raise ValidationError(f"Task '{self.title}' cannot depend on '{self.dependency.title}': it would create a dependency cycle.")
         
         if self.status not in dict(self.STATUS_CHOICES):
             raise ValidationError(f"Invalid status: {self.status}")
@@ -64,9 +83,62 @@ class Task(models.Model):
         if self.priority not in dict(self.PRIORITY_CHOICES):
             raise ValidationError(f"Invalid priority: {self.priority}")
 
+    # The fields that decide which reminders a task needs
+    REMINDER_FIELDS = ('due_date', 'status', 'assignee_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & set(cls.REMINDER_FIELDS):
+            instance._loaded_reminder_state = instance.reminder_state()
+        return instance
+
+    def reminder_state(self):
+        return tuple(getattr(self, field) for field in self.REMINDER_FIELDS)
+
+    def reminder_state_changed(self):
+        # Instances not loaded with all reminder fields are assumed to have changed
+        return getattr(self, '_loaded_reminder_state', None) != self.reminder_state()
+
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.title} - {self.project.name}"
\ No newline at end of file
+        return f"{self.title} - {self.project.name}"
+
+class DeadlineAlert(models.Model):
+    KIND_CHOICES = [
+        ('upcoming', 'Upcoming'),
+        ('overdue', 'Overdue'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='deadline_alerts')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # A rescheduled task is alerted again for its new due date
+    due_date = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('task', 'kind', 'due_date')
+
+    def __str__(self):
+        return f"{self.kind} alert for task {self.task_id} due {self.due_date}"
+
+
+class TaskReminder(models.Model):
+    """A pending deadline alert, polled by ``remind_at`` instead of scanning every task."""
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    kind = models.CharField(max_length=10, choices=DeadlineAlert.KIND_CHOICES)
+    # The due date the reminder was scheduled for; it is stale once the task moves
+    due_date = models.DateField()
+    remind_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('task', 'kind')
+        indexes = [
+            models.Index(fields=['remind_at'], name='task_reminder_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} reminder for task {self.task_id} at {self.remind_at}"
@@ -0,0 +1,122 @@
+import uuid
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .dependency_graph import DependencyGraph
+from .models import Task
+
+
+def _cache():
+    return caches[settings.SCHEDULE_CACHE_ALIAS]
+
+
+def _version_key(project_id):
+    return f'schedule:version:{project_id}'
+
+
+def _new_version():
+    # Random rather than a counter: if the version key is evicted, a fresh one can never match old entries
+    return uuid.uuid4().hex
+
+
+def invalidate_schedules(project_ids):
+    """Drop the cached analysis of the given projects by giving them new versions."""
+    _cache().set_many({_version_key(project_id): _new_version() for project_id in set(project_ids)}, timeout=None)
+
+
+def critical_path_analysis(project):
+    """
+    Critical path method over the project's dependency DAG.
+
+    Tasks are laid out in topological order in flat arrays (durations,
+    parent offsets) so the forward pass (earliest start/finish) and the
+    backward pass (latest start/finish) are each one linear sweep. Offsets
+    are in days from the project start; slack 0 marks critical tasks.
+    """
+    rows = list(
+        Task.objects.filter(project_id=project.pk)
+        .values_list('id', 'status', 'dependency_id', 'estimated_days')
+    )
+    graph = DependencyGraph((task_id, task_status, (dep,)) for task_id, task_status, dep, _ in rows)
+    try:
+        order = graph.topological_order()
+    except ValueError as e:
+        return {'project': project.pk, 'error': str(e)}
+
+    durations_by_id = {task_id: days for task_id, _, _, days in rows}
+    position = {task_id: i for i, task_id in enumerate(order)}
+    size = len(order)
+    duration = array('l', (durations_by_id[task_id] for task_id in order))
+    # CSR layout of each task's parents, as positions in ``order``
+    parent_start = array('l', [0]) * (size + 1)
+    parents = array('l')
+    for i, task_id in enumerate(order):
+        parents.extend(position[d] for d in graph.parents.get(task_id, ()) if d in position)
+        parent_start[i + 1] = len(parents)
+
+    earliest_start = array('l', [0]) * size
+    earliest_finish = array('l', [0]) * size
+    for i in range(size):
+        start = 0
+        for p in parents[parent_start[i]:parent_start[i + 1]]:
+            if earliest_finish[p] > start:
+                start = earliest_finish[p]
+        earliest_start[i] = start
+        earliest_finish[i] = start + duration[i]
+
+    finish = max(earliest_finish, default=0)
+    latest_finish = array('l', [finish]) * size
+    latest_start = array('l', [0]) * size
+    for i in range(size - 1, -1, -1):
+        latest_start[i] = latest_finish[i] - duration[i]
+        for p in parents[parent_start[i]:parent_start[i + 1]]:
+            if latest_start[i] < latest_finish[p]:
+                latest_finish[p] = latest_start[i]
+
+    # Walk back from the task finishing last through parents that leave it no slack
+    critical_path = []
+    i = max(range(size), key=earliest_finish.__getitem__, default=None)
+    while i is not None:
+        critical_path.append(order[i])
+        i = next(
+            (p for p in parents[parent_start[i]:parent_start[i + 1]]
+             if earliest_finish[p] == earliest_start[i] and latest_start[p] == earliest_start[p]),
+            None
+        )
+    critical_path.reverse()
+
+    # Far fewer distinct offsets than tasks, so convert each to a date once
+    offsets = set(earliest_start) | set(earliest_finish) | set(latest_start) | set(latest_finish) | {finish}
+    dates = {offset: project.start_date + timedelta(days=offset) for offset in offsets}
+    return {
+        'project': project.pk,
+        'duration_days': finish,
+        'finish_date': dates[finish],
+        'critical_path': critical_path,
+        'tasks': [
+            {
+                'id': task_id,
+                'earliest_start': dates[earliest_start[i]],
+                'earliest_finish': dates[earliest_finish[i]],
+                'latest_start': dates[latest_start[i]],
+                'latest_finish': dates[latest_finish[i]],
+                'slack_days': latest_start[i] - earliest_start[i],
+            }
+            for i, task_id in enumerate(order)
+        ],
+    }
+
+
+def get_schedule_analysis(project):
+    """Cached ``critical_path_analysis``; valid until a task of the project changes."""
+    cache = _cache()
+    version = cache.get_or_set(_version_key(project.pk), _new_version, timeout=None)
+    key = f'schedule:{project.pk}:{version}:{project.start_date.isoformat()}'
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = critical_path_analysis(project)
+        cache.set(key, analysis, timeout=settings.SCHEDULE_CACHE_TTL)
+    return analysis
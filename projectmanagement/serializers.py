@@ -1,11 +1,16 @@
+import base64
+import json
+from datetime import date
+
 from rest_framework import serializers
+from .fields import BulkPrimaryKeyRelatedField
 from .models import Project, ProjectTeamMember, Milestone, Task
 from authflow.models import CustomUser 
 
 class ProjectSerializer(serializers.ModelSerializer):
-    team_members = serializers.PrimaryKeyRelatedField(
+    team_members = BulkPrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(),  # Allow assigning existing users
-        many=True  # Accept multiple user IDs
+        many=True  # Accept multiple user IDs, resolved with one query
     )
 
     class Meta:
@@ -17,6 +22,25 @@ class ProjectTeamMemberSerializer(serializers.ModelSerializer):
         model = ProjectTeamMember
         fields = ['id', 'project', 'user', 'role']
 
+class TeamMemberChangeSerializer(serializers.Serializer):
+    user = serializers.IntegerField()
+    role = serializers.IntegerField(allow_null=True, required=False, default=None)
+
+class TeamMembershipSerializer(serializers.Serializer):
+    add = TeamMemberChangeSerializer(many=True, required=False, default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    update = TeamMemberChangeSerializer(many=True, required=False, default=list)
+
+    def validate(self, attrs):
+        if not (attrs['add'] or attrs['remove'] or attrs['update']):
+            raise serializers.ValidationError("Provide at least one of 'add', 'remove' or 'update'.")
+        seen = set()
+        for user_id in [item['user'] for item in attrs['add'] + attrs['update']] + attrs['remove']:
+            if user_id in seen:
+                raise serializers.ValidationError(f"User {user_id} appears more than once.")
+            seen.add(user_id)
+        return attrs
+
 class MilestoneSerializer(serializers.ModelSerializer):
     class Meta:
         model = Milestone
@@ -25,7 +49,7 @@ class MilestoneSerializer(serializers.ModelSerializer):
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = ['id', 'project', 'title', 'description', 'assignee', 'priority', 'due_date', 'status', 'dependency']
+        fields = ['id', 'project', 'title', 'description', 'assignee', 'priority', 'due_date', 'status', 'dependency', 'estimated_days']
 
 class ScheduleSerializer(serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
@@ -33,4 +57,54 @@ class ScheduleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Project
-        fields = ['id', 'name', 'start_date', 'end_date', 'tasks', 'milestones']
\ No newline at end of file
+        fields = ['id', 'name', 'start_date', 'end_date', 'tasks', 'milestones']
+
+class TaskTransitionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+class BulkTaskTransitionSerializer(serializers.Serializer):
+    transitions = TaskTransitionSerializer(many=True, required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if ('transitions' in attrs) == ('ids' in attrs):
+            raise serializers.ValidationError("Provide either 'transitions' or 'ids' with a target 'status'.")
+        if 'ids' in attrs and 'status' not in attrs:
+            raise serializers.ValidationError({'status': "A target status is required with 'ids'."})
+        return attrs
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+class TaskListQuerySerializer(serializers.Serializer):
+    ORDERINGS = ['id', '-id', 'due_date', '-due_date']
+
+    project = serializers.IntegerField(required=False)
+    assignee = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    due_after = serializers.DateField(required=False)
+    due_before = serializers.DateField(required=False)
+    ordering = serializers.ChoiceField(choices=ORDERINGS, required=False, default='id')
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=200, required=False, default=50)
+
+    def validate(self, attrs):
+        if 'cursor' in attrs:
+            # Cursors are the sort key of the last row: [id] or [due_date, id]
+            try:
+                values = json.loads(base64.urlsafe_b64decode(attrs['cursor'].encode()))
+            except ValueError:
+                raise serializers.ValidationError({'cursor': 'Invalid cursor.'})
+            size = 1 if attrs['ordering'].lstrip('-') == 'id' else 2
+            if not isinstance(values, list) or len(values) != size or not isinstance(values[-1], int):
+                raise serializers.ValidationError({'cursor': 'Cursor does not match the ordering.'})
+            if size == 2:
+                try:
+                    values[0] = date.fromisoformat(values[0])
+                except (TypeError, ValueError):
+                    raise serializers.ValidationError({'cursor': 'Cursor does not match the ordering.'})
+            attrs['cursor'] = values
+        return attrs
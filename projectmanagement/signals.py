@@ -0,0 +1,26 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .deadline_alerts import add_reminders, schedule_reminders
+from .models import Task
+from .scheduling import invalidate_schedules
+
+# Like authflow's cache invalidation this runs on commit, so no request can re-cache the old rows in between.
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_project_schedule(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_schedules, [instance.project_id]))
+
+
+@receiver(post_save, sender=Task)
+def reschedule_task_reminders(sender, instance, created, update_fields=None, **kwargs):
+    # Only the due date, status and assignee decide which reminders a task needs, so other edits cost nothing here
+    if created:
+        add_reminders([instance])
+    elif instance.reminder_state_changed() and (
+        update_fields is None or {'due_date', 'status', 'assignee', 'assignee_id'} & set(update_fields)
+    ):
+        schedule_reminders([instance.pk])
+    instance._loaded_reminder_state = instance.reminder_state()
@@ -1,28 +1,39 @@
-# filepath: e:\Authentication\projectmanagement\tasks.py
+import logging
+import time
+from datetime import datetime
 
-from celery import shared_task  # Correct import
-from django.utils.timezone import now, timedelta
-from .models import Task
-from django.core.mail import send_mail
+from celery import chord, shared_task
+from django.utils import timezone
+from .deadline_alerts import drop_unassigned_reminders, plan_shards, send_deadline_digests
+
+logger = logging.getLogger(__name__)
 
 @shared_task
 def send_deadline_alerts():
-    approaching_deadline = now() + timedelta(days=1)
-    overdue_tasks = Task.objects.filter(due_date__lt=now(), status__in=['Not Started', 'In Progress'])
-    upcoming_tasks = Task.objects.filter(due_date__lte=approaching_deadline, due_date__gte=now(), status__in=['Not Started', 'In Progress'])
+    # Fan the due reminders out over assignee shards; the chord callback reports the totals.
+    now = timezone.now()
+    drop_unassigned_reminders(now)
+    shards = plan_shards(now)
+    if shards:
+        chord(
+            send_deadline_alert_shard.s(start, end, now.isoformat()) for start, end in shards
+        )(summarize_deadline_alerts.s())
+    return {'shards': shards}
 
-    for task in overdue_tasks:
-        send_mail(
-            'Task Overdue',
-            f"The task '{task.title}' is overdue.",
-            'noreply@example.com',
-            [task.assignee.email]
-        )
+@shared_task
+def send_deadline_alert_shard(start, end, now):
+    started = time.perf_counter()
+    counts = send_deadline_digests(now=datetime.fromisoformat(now), assignee_range=(start, end))
+    return {**counts, 'shard': [start, end], 'seconds': round(time.perf_counter() - started, 3)}
 
-    for task in upcoming_tasks:
-        send_mail(
-            'Task Deadline Approaching',
-            f"The task '{task.title}' is due soon.",
-            'noreply@example.com',
-            [task.assignee.email]
-        )
\ No newline at end of file
+@shared_task
+def summarize_deadline_alerts(results):
+    summary = {key: sum(result[key] for result in results) for key in ('alerts', 'digests', 'skipped')}
+    summary['seconds'] = max((result['seconds'] for result in results), default=0)
+    summary['shards'] = results
+    for result in results:
+        logger.info(
+            "Deadline alert shard %s: %d alerts in %d digests (%d skipped) in %.3fs",
+            result['shard'], result['alerts'], result['digests'], result['skipped'], result['seconds']
+        )
+    return summary
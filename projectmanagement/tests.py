@@ -1,9 +1,22 @@
-from django.test import TestCase
+import json
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from datetime import timedelta
 from authflow.models import CustomUser, Role
-from .models import Project, ProjectTeamMember, Milestone, Task
+from rest_framework.test import APIClient
+from notifications.models import OutboundEmail
+from Authentication.celery import app as celery_app
+from .models import Project, ProjectTeamMember, Milestone, Task, DeadlineAlert, TaskReminder
+from .dependency_graph import DependencyGraph, closes_cycle
+from .scheduling import _version_key, get_schedule_analysis
+from .tasks import send_deadline_alerts, summarize_deadline_alerts
+from .deadline_alerts import plan_shards, send_deadline_digests
+from .transitions import transition_tasks
 
 class ProjectTests(TestCase):
     def setUp(self):
@@ -271,3 +284,844 @@ class TaskTests(TestCase):
         with self.assertRaises(ValidationError):
             task.full_clean()
             task.save()
+
+class DependencyGraphTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name='Test Project',
+            description='Test Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        # a <- b <- c, a <- d; only a is completed
+        self.a = self.make_task('A', status='Completed')
+        self.b = self.make_task('B', dependency=self.a, status='Completed')
+        self.c = self.make_task('C', dependency=self.b)
+        self.d = self.make_task('D', dependency=self.a)
+        Task.objects.filter(pk=self.b.pk).update(status='In Progress')
+
+    def make_task(self, title, **kwargs):
+        return Task.objects.create(
+            project=self.project,
+            assignee=self.user,
+            title=title,
+            description=title,
+            priority='Low',
+            due_date=(timezone.now() + timedelta(days=7)).date(),
+            **kwargs
+        )
+
+    def test_graph_loads_in_one_query(self):
+        """Test that the whole project graph is built from a single query"""
+        with self.assertNumQueries(1):
+            graph = DependencyGraph.for_project(self.project.pk)
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(graph.ancestors(self.c.pk), {self.a.pk, self.b.pk})
+        self.assertEqual(graph.descendants(self.a.pk), {self.b.pk, self.c.pk, self.d.pk})
+
+    def test_unblocked_tasks(self):
+        """Test that only open tasks with completed dependencies are unblocked"""
+        graph = DependencyGraph.for_project(self.project.pk)
+        self.assertFalse(graph.is_unblocked(self.c.pk))
+        self.assertEqual(graph.blockers(self.c.pk), [self.b.pk])
+        self.assertEqual(sorted(graph.unblocked_tasks()), sorted([self.b.pk, self.d.pk]))
+
+    def test_cycle_rejected_on_save(self):
+        """Test that a dependency closing a loop is rejected"""
+        Task.objects.filter(pk=self.c.pk).update(status='Completed')
+        self.a.dependency = self.c
+        with self.assertRaises(ValidationError):
+            self.a.save()
+        self.assertIsNone(Task.objects.get(pk=self.a.pk).dependency_id)
+
+    def test_cycle_check_reads_only_the_chain(self):
+        """Test that the save-time cycle check walks the dependency chain in one query"""
+        Task.objects.filter(pk=self.c.pk).update(status='Completed')
+        self.assertTrue(closes_cycle(self.a.pk, self.c.pk))
+        self.assertFalse(closes_cycle(self.d.pk, self.c.pk))
+        self.assertTrue(closes_cycle(self.a.pk, self.a.pk))
+        with CaptureQueriesContext(connection) as queries:
+            closes_cycle(self.a.pk, self.c.pk)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('project_id', queries[0]['sql'])
+
+    def test_cycle_rejected_by_api(self):
+        """Test that the task endpoint reports a dependency cycle as a 400"""
+        Task.objects.filter(pk=self.c.pk).update(status='Completed')
+        response = APIClient().patch(f'/api/project-management/tasks/{self.a.pk}/', {'dependency': self.c.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cycle', response.data['error'])
+
+    def test_topological_order(self):
+        """Test that dependencies come before their dependents"""
+        order = DependencyGraph.for_project(self.project.pk).topological_order()
+        self.assertLess(order.index(self.a.pk), order.index(self.b.pk))
+        self.assertLess(order.index(self.b.pk), order.index(self.c.pk))
+        graph = DependencyGraph([(1, 'Completed', [2]), (2, 'Completed', [1])])
+        with self.assertRaises(ValueError):
+            graph.topological_order()
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CriticalPathTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(
+            name='Test Project',
+            description='Test Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        # a(2) -> b(3); a(2) -> c(1) -> d(4): the a-c-d chain is critical, b has 2 days of slack
+        self.a = self.make_task('A', 2)
+        self.b = self.make_task('B', 3, dependency=self.a)
+        self.c = self.make_task('C', 1, dependency=self.a)
+        self.d = self.make_task('D', 4, dependency=self.c)
+
+    def make_task(self, title, days, **kwargs):
+        return Task.objects.create(
+            project=self.project,
+            assignee=self.user,
+            title=title,
+            description=title,
+            priority='Low',
+            status='Completed',
+            due_date=(timezone.now() + timedelta(days=7)).date(),
+            estimated_days=days,
+            **kwargs
+        )
+
+    def test_forward_and_backward_pass(self):
+        """Test earliest/latest starts, slack and the critical path"""
+        analysis = get_schedule_analysis(self.project)
+        tasks = {task['id']: task for task in analysis['tasks']}
+        start = self.project.start_date
+        self.assertEqual(analysis['duration_days'], 7)
+        self.assertEqual(analysis['critical_path'], [self.a.pk, self.c.pk, self.d.pk])
+        self.assertEqual(tasks[self.b.pk]['earliest_start'], start + timedelta(days=2))
+        self.assertEqual(tasks[self.b.pk]['latest_start'], start + timedelta(days=4))
+        self.assertEqual(tasks[self.b.pk]['slack_days'], 2)
+        self.assertEqual(tasks[self.d.pk]['slack_days'], 0)
+
+    def test_analysis_cached_until_task_changes(self):
+        """Test that the analysis is served from cache until a task of the project changes"""
+        get_schedule_analysis(self.project)
+        with self.assertNumQueries(0):
+            get_schedule_analysis(self.project)
+        self.b.estimated_days = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.save()
+        analysis = get_schedule_analysis(self.project)
+        self.assertEqual(analysis['critical_path'], [self.a.pk, self.b.pk])
+        self.assertEqual(analysis['duration_days'], 12)
+
+    def test_evicted_version_does_not_revive_old_analysis(self):
+        """Test that losing the version key never brings back an analysis from before a change"""
+        get_schedule_analysis(self.project)
+        self.b.estimated_days = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.save()
+        get_schedule_analysis(self.project)
+        cache.delete(_version_key(self.project.pk))
+        self.assertEqual(get_schedule_analysis(self.project)['duration_days'], 12)
+
+    def test_schedule_endpoint_analysis_mode(self):
+        """Test the critical-path mode of the schedule endpoint"""
+        response = APIClient().get('/api/project-management/schedule/', {'analysis': 'critical-path', 'project': self.project.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['critical_path'], [self.a.pk, self.c.pk, self.d.pk])
+
+class BulkTaskTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name='Test Project',
+            description='Test Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        self.client = APIClient()
+        self.due_date = (timezone.now() + timedelta(days=7)).date().isoformat()
+
+    def new_task(self, temp_id, **kwargs):
+        item = {
+            'temp_id': temp_id, 'project': self.project.pk, 'title': temp_id, 'description': temp_id,
+            'assignee': self.user.pk, 'priority': 'Low', 'due_date': self.due_date,
+        }
+        item.update(kwargs)
+        return item
+
+    def post(self, tasks):
+        return self.client.post('/api/project-management/tasks/bulk/', {'tasks': tasks}, format='json')
+
+    def test_bulk_create_with_temp_ids(self):
+        """Test that a plan with intra-batch dependencies is written with a constant number of queries"""
+        tasks = [self.new_task('t0', status='Completed')]
+        tasks += [self.new_task(f't{i}', status='Completed', dependency=f't{i - 1}') for i in range(1, 50)]
+        with self.assertNumQueries(7):
+            response = self.post(tasks)
+        self.assertEqual(response.status_code, 200)
+        ids = {result['temp_id']: result['id'] for result in response.data['results']}
+        self.assertEqual(Task.objects.get(pk=ids['t49']).dependency_id, ids['t48'])
+        self.assertEqual(OutboundEmail.objects.count(), 50)
+
+    def test_batch_limit_read_per_request(self):
+        """Test that TASK_BULK_MAX_ITEMS is honoured when changed after import"""
+        with self.settings(TASK_BULK_MAX_ITEMS=2):
+            response = self.post([self.new_task(f'cap{i}') for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tasks', response.data)
+        self.assertFalse(Task.objects.exists())
+
+    def test_unassigned_tasks(self):
+        """Test that tasks can be created without an assignee and have their assignee cleared"""
+        response = self.post([self.new_task('solo', assignee=None), self.new_task('owned')])
+        self.assertEqual(response.status_code, 200, response.data)
+        ids = {result['temp_id']: result['id'] for result in response.data['results']}
+        self.assertIsNone(Task.objects.get(pk=ids['solo']).assignee_id)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+        response = self.post([{'id': ids['owned'], 'assignee': None}])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNone(Task.objects.get(pk=ids['owned']).assignee_id)
+        self.assertFalse(TaskReminder.objects.filter(task_id=ids['owned']).exists())
+
+    def test_bulk_update(self):
+        """Test that updates and creates can be mixed, including new dependencies on existing tasks"""
+        self.post([self.new_task('a'), self.new_task('b')])
+        a, b = Task.objects.order_by('id')
+        response = self.post([
+            {'id': a.pk, 'status': 'Completed', 'priority': 'High'},
+            {'id': b.pk, 'dependency': a.pk},
+            self.new_task('c', dependency=a.pk),
+        ])
+        self.assertEqual(response.status_code, 200)
+        b.refresh_from_db()
+        self.assertEqual(b.dependency_id, a.pk)
+        self.assertEqual(Task.objects.get(pk=a.pk).priority, 'High')
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_per_item_errors_write_nothing(self):
+        """Test that invalid items are reported by index and nothing is written"""
+        response = self.post([
+            self.new_task('a'),
+            self.new_task('b', dependency='a'),
+            self.new_task('c', priority='Urgent'),
+            self.new_task('d', dependency='missing'),
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('dependency', response.data['errors'][0]['errors'])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_cycle_rejected(self):
+        """Test that an update closing a loop through a new task is rejected"""
+        self.post([self.new_task('a', status='Completed')])
+        a = Task.objects.get()
+        response = self.post([
+            self.new_task('b', status='Completed', dependency=a.pk),
+            {'id': a.pk, 'dependency': 'b'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Task.objects.count(), 1)
+
+class TaskTransitionTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name='Test Project',
+            description='Test Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        # a <- b <- c, with a and b completed so the chain can be created; d depends on nothing
+        self.a = self.make_task('A', status='Completed')
+        self.b = self.make_task('B', status='Completed', dependency=self.a)
+        self.c = self.make_task('C', dependency=self.b)
+        self.d = self.make_task('D')
+        Task.objects.filter(pk__in=[self.a.pk, self.b.pk]).update(status='In Progress')
+
+    def make_task(self, title, **kwargs):
+        return Task.objects.create(
+            project=self.project,
+            assignee=self.user,
+            title=title,
+            description=title,
+            priority='Low',
+            due_date=(timezone.now() + timedelta(days=7)).date(),
+            **kwargs
+        )
+
+    def statuses(self):
+        return dict(Task.objects.values_list('title', 'status'))
+
+    def test_batch_completions_unblock_dependents(self):
+        """Test that completing a chain in one batch counts completions made by the same batch"""
+        # savepoint, one locking select, one UPDATE, reminder DELETE and SELECT (none left to insert), release
+        with self.assertNumQueries(6):
+            results = transition_tasks([(t.pk, 'Completed') for t in (self.c, self.b, self.a, self.d)])
+        self.assertTrue(all(result['status'] == 'updated' for result in results))
+        self.assertEqual(set(self.statuses().values()), {'Completed'})
+
+    def test_only_violating_rows_rejected(self):
+        """Test that blocked tasks are skipped while the rest are applied"""
+        results = transition_tasks([(self.c.pk, 'In Progress'), (self.d.pk, 'In Progress'), (999999, 'Completed')])
+        self.assertEqual([result['status'] for result in results], ['blocked', 'updated', 'not_found'])
+        self.assertEqual(self.statuses()['C'], 'Not Started')
+        self.assertEqual(self.statuses()['D'], 'In Progress')
+
+    def test_rejection_cascades(self):
+        """Test that a dependent is blocked when its dependency's own transition is rejected"""
+        results = transition_tasks([(self.b.pk, 'Completed'), (self.c.pk, 'Completed')])
+        self.assertEqual([result['status'] for result in results], ['blocked', 'blocked'])
+
+    def test_status_endpoint(self):
+        """Test moving many tasks to one status through the API"""
+        response = APIClient().post('/api/project-management/tasks/status/', {
+            'ids': [self.a.pk, self.d.pk], 'status': 'Completed'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        response = APIClient().post('/api/project-management/tasks/status/', {
+            'transitions': [{'id': self.a.pk, 'status': 'Done'}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_action(self):
+        """Test the TaskAdmin bulk completion action"""
+        admin_user = CustomUser.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin123', phone_number='111'
+        )
+        self.client.force_login(admin_user)
+        response = self.client.post('/admin/projectmanagement/task/', {
+            'action': 'mark_completed', '_selected_action': [self.a.pk, self.c.pk]
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.statuses()['A'], 'Completed')
+        self.assertEqual(self.statuses()['C'], 'Not Started')
+
+class TaskListTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            name='Test Project',
+            description='Test Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.other = Project.objects.create(
+            name='Other Project',
+            description='Other Project Description',
+            start_date=timezone.now().date(),
+            end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        today = timezone.now().date()
+        for i in range(12):
+            Task.objects.create(
+                project=self.project if i % 3 else self.other,
+                assignee=self.user,
+                title=f'Task {i}',
+                description='Task',
+                priority='High' if i % 2 else 'Low',
+                due_date=today + timedelta(days=i % 4),
+                status='In Progress' if i % 2 else 'Not Started',
+            )
+        self.client = APIClient()
+
+    def fetch_all(self, **params):
+        results, cursor = [], None
+        while True:
+            query = dict(params, limit=5)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get('/api/project-management/tasks/', query)
+            self.assertEqual(response.status_code, 200)
+            results += response.data['results']
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return results
+
+    def test_filters(self):
+        """Test filtering by project, status, priority and due-date range"""
+        today = timezone.now().date()
+        results = self.fetch_all(project=self.project.pk, status='In Progress')
+        expected = Task.objects.filter(project=self.project, status='In Progress')
+        self.assertEqual({t['id'] for t in results}, set(expected.values_list('id', flat=True)))
+        results = self.fetch_all(priority='Low', due_after=today + timedelta(days=1), due_before=today + timedelta(days=2))
+        expected = Task.objects.filter(priority='Low', due_date__range=(today + timedelta(days=1), today + timedelta(days=2)))
+        self.assertEqual({t['id'] for t in results}, set(expected.values_list('id', flat=True)))
+
+    def test_keyset_pagination_by_due_date(self):
+        """Test that paging by due date returns every task once, in order"""
+        for ordering in ('due_date', '-due_date', '-id'):
+            results = self.fetch_all(ordering=ordering)
+            keys = [(t['due_date'], t['id']) if 'due_date' in ordering else t['id'] for t in results]
+            self.assertEqual(len(results), 12)
+            self.assertEqual(keys, sorted(keys, reverse=ordering.startswith('-')))
+
+    def test_single_query_per_page(self):
+        """Test that a page costs one query"""
+        with self.assertNumQueries(1):
+            self.client.get('/api/project-management/tasks/', {'assignee': self.user.pk, 'status': 'Not Started'})
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get('/api/project-management/tasks/', {'cursor': 'nope', 'ordering': 'due_date'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_detail_get(self):
+        """Test that the task detail route stays update-only"""
+        task = Task.objects.filter(project=self.project).first()
+        response = self.client.get(f'/api/project-management/tasks/{task.pk}/')
+        self.assertEqual(response.status_code, 405)
+
+    def test_filters_use_indexes(self):
+        """Test that EXPLAIN shows an index for every filter combination"""
+        today = timezone.now().date()
+        combinations = [
+            {'project': self.project.pk},
+            {'project': self.project.pk, 'status': 'Completed'},
+            {'assignee': self.user.pk},
+            {'assignee': self.user.pk, 'status': 'Completed'},
+            {'assignee': self.user.pk, 'status': 'Completed', 'due_date__lte': today},
+            {'status': 'Completed'},
+            {'status': 'Completed', 'due_date__gte': today},
+            {'due_date__gte': today, 'due_date__lte': today},
+            {'project': self.project.pk, 'priority': 'High'},
+        ]
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny; make the planner show which index it would use
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for filters in combinations:
+            plan = Task.objects.filter(**filters).order_by('id').explain()
+            if connection.vendor == 'sqlite':
+                self.assertIn('SEARCH projectmanagement_task USING INDEX', plan, msg=f'{filters}: {plan}')
+            else:
+                self.assertNotIn('Seq Scan', plan, msg=f'{filters}: {plan}')
+
+class ScheduleStreamTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='member', email='member@example.com', password='member123', phone_number='0987654321'
+        )
+        for i in range(5):
+            project = Project.objects.create(
+                name=f'Project {i}',
+                description='Project',
+                start_date=timezone.now().date(),
+                end_date=(timezone.now() + timedelta(days=30)).date()
+            )
+            Task.objects.create(
+                project=project, assignee=self.user, title=f'Task {i}', description='Task',
+                priority='Low', due_date=(timezone.now() + timedelta(days=7)).date(),
+            )
+            Milestone.objects.create(project=project, title=f'Milestone {i}', description='Milestone', due_date=project.end_date)
+
+    @override_settings(SCHEDULE_STREAM_CHUNK_SIZE=2)
+    def test_stream_matches_buffered_response(self):
+        """Test that the streamed schedule has the same content as the buffered one"""
+        client = APIClient()
+        buffered = client.get('/api/project-management/schedule/')
+        response = client.get('/api/project-management/schedule/', {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        # One project query read in 3 chunks, each prefetching its tasks and milestones
+        with self.assertNumQueries(7):
+            body = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(body), json.loads(buffered.content))
+
+class ProjectMembersQueryTests(TestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='x', phone_number=f'55{i}'
+            )
+            for i in range(30)
+        ]
+        self.client = APIClient()
+        self.project_data = {
+            'name': 'Test Project',
+            'description': 'Test Project Description',
+            'start_date': timezone.now().date().isoformat(),
+            'end_date': (timezone.now() + timedelta(days=30)).date().isoformat(),
+        }
+
+    def test_create_resolves_members_in_one_query(self):
+        """Test that creating a project costs the same number of queries for 3 or 30 members"""
+        counts = []
+        for size in (3, 30):
+            data = dict(self.project_data, team_members=[u.pk for u in self.users[:size]])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/project-management/projects/', data, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['team_members']), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_missing_members_reported_together(self):
+        """Test that every unknown member id is reported in one error"""
+        data = dict(self.project_data, team_members=[self.users[0].pk, 999998, 999999])
+        response = self.client.post('/api/project-management/projects/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999998', str(response.data['team_members']))
+        self.assertIn('999999', str(response.data['team_members']))
+        self.assertEqual(Project.objects.count(), 0)
+
+    def test_list_and_patch_constant_queries(self):
+        """Test that listing projects and replacing members take a constant number of queries"""
+        for i in range(5):
+            project = Project.objects.create(**dict(self.project_data, name=f'Project {i}'))
+            project.team_members.set(self.users[i:i + 10])
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/project-management/projects/')
+        self.assertEqual(len(response.data), 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/api/project-management/projects/', {
+                'project_id': project.pk, 'team_members': [u.pk for u in self.users]
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['team_members']), 30)
+        self.assertLessEqual(len(queries), 8)
+
+class ProjectMembershipTests(TestCase):
+    def setUp(self):
+        self.lead = Role.objects.create(name='Lead', description='Lead')
+        self.dev = Role.objects.create(name='Developer', description='Developer')
+        self.users = [
+            CustomUser.objects.create_user(
+                username=f'member{i}', email=f'member{i}@example.com', password='x', phone_number=f'66{i}'
+            )
+            for i in range(40)
+        ]
+        self.project = Project.objects.create(
+            name='Team Project', description='Team Project',
+            start_date=timezone.now().date(), end_date=(timezone.now() + timedelta(days=30)).date()
+        )
+        ProjectTeamMember.objects.bulk_create(
+            ProjectTeamMember(project=self.project, user=user, role=self.dev) for user in self.users[:20]
+        )
+        self.url = f'/api/project-management/projects/{self.project.pk}/members/'
+        self.client = APIClient()
+
+    def roles(self):
+        return dict(ProjectTeamMember.objects.filter(project=self.project).values_list('user_id', 'role_id'))
+
+    def test_list_members_with_roles(self):
+        """Test listing a project's members with their roles"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]['role'], self.dev.pk)
+
+    def test_add_remove_and_update(self):
+        """Test that adds, removes and role changes are applied together"""
+        response = self.client.patch(self.url, {
+            'add': [{'user': self.users[20].pk, 'role': self.lead.pk}, {'user': self.users[0].pk}],
+            'remove': [self.users[1].pk, self.users[30].pk],
+            'update': [{'user': self.users[2].pk, 'role': self.lead.pk}, {'user': self.users[3].pk, 'role': self.dev.pk}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'added': [self.users[20].pk], 'removed': [self.users[1].pk], 'updated': [self.users[2].pk],
+        })
+        roles = self.roles()
+        self.assertEqual(roles[self.users[20].pk], self.lead.pk)
+        self.assertEqual(roles[self.users[0].pk], self.dev.pk)
+        self.assertNotIn(self.users[1].pk, roles)
+        self.assertEqual(roles[self.users[2].pk], self.lead.pk)
+
+    def test_invalid_changes_write_nothing(self):
+        """Test that unknown users, unknown roles and non-member updates reject the whole change"""
+        response = self.client.patch(self.url, {
+            'add': [{'user': self.users[20].pk}, {'user': 999999}],
+            'remove': [self.users[0].pk],
+            'update': [{'user': self.users[25].pk, 'role': self.lead.pk}, {'user': self.users[1].pk, 'role': 888888}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999999', str(response.data['add']))
+        self.assertIn(str(self.users[25].pk), str(response.data['update']))
+        self.assertIn('888888', str(response.data['role']))
+        self.assertEqual(len(self.roles()), 20)
+        self.assertIn(self.users[0].pk, self.roles())
+
+    def test_conflicting_changes_rejected(self):
+        """Test that a user cannot appear in more than one list"""
+        response = self.client.patch(self.url, {
+            'add': [{'user': self.users[20].pk}], 'remove': [self.users[20].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_project(self):
+        """Test that an unknown project returns 404"""
+        response = self.client.patch('/api/project-management/projects/999999/members/', {
+            'remove': [self.users[0].pk]
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_large_diff_constant_queries(self):
+        """Test that a diff touching many members costs the same number of queries as a small one"""
+        counts = []
+        # Each round adds, removes and promotes disjoint members; the second round is several times larger
+        for added, removed, updated in ((range(20, 22), range(0, 2), range(2, 4)),
+                                        (range(22, 34), range(4, 16), range(16, 22))):
+            data = {
+                'add': [{'user': self.users[i].pk, 'role': self.dev.pk} for i in added],
+                'remove': [self.users[i].pk for i in removed],
+                'update': [{'user': self.users[i].pk, 'role': self.lead.pk} for i in updated],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(self.url, data, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(len(response.data['added']), len(added))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+class DeadlineAlertTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.alice = CustomUser.objects.create_user(
+            username='alice', email='alice@example.com', password='x', phone_number='7001'
+        )
+        self.bob = CustomUser.objects.create_user(
+            username='bob', email='bob@example.com', password='x', phone_number='7002'
+        )
+        self.project = Project.objects.create(
+            name='Alerts', description='Alerts', start_date=self.today, end_date=self.today + timedelta(days=30)
+        )
+
+    def task(self, title, assignee, days, status='Not Started'):
+        return Task.objects.create(
+            project=self.project, title=title, description=title, assignee=assignee,
+            priority='Low', due_date=self.today + timedelta(days=days), status=status
+        )
+
+    def test_one_digest_per_assignee(self):
+        """Test that overdue and upcoming tasks are grouped into one digest per assignee"""
+        self.task('Late', self.alice, -2)
+        self.task('Soon', self.alice, 1)
+        self.task('Later', self.alice, 5)
+        self.task('Done', self.alice, -1, status='Completed')
+        self.task('Bob late', self.bob, -1)
+        counts = send_deadline_digests()
+        self.assertEqual(counts, {'alerts': 3, 'digests': 2, 'skipped': 0})
+
+        alice_mail = OutboundEmail.objects.get(recipients=['alice@example.com'])
+        self.assertEqual(alice_mail.subject, 'Task deadlines: 1 overdue, 1 due soon')
+        self.assertIn('Late (Alerts)', alice_mail.body)
+        self.assertIn('Soon (Alerts)', alice_mail.body)
+        self.assertNotIn('Later', alice_mail.body)
+        self.assertNotIn('Done', alice_mail.body)
+        self.assertEqual(OutboundEmail.objects.filter(recipients=['bob@example.com']).count(), 1)
+
+    def test_alerts_fire_once(self):
+        """Test that a second run sends nothing and only new or rescheduled alerts go out later"""
+        late = self.task('Late', self.alice, -2)
+        send_deadline_digests()
+        self.assertEqual(send_deadline_digests(), {'alerts': 0, 'digests': 0, 'skipped': 0})
+
+        late.due_date = self.today + timedelta(days=1)
+        late.save()
+        self.task('New', self.bob, 0)
+        counts = send_deadline_digests()
+        self.assertEqual(counts, {'alerts': 2, 'digests': 2, 'skipped': 0})
+        self.assertEqual(DeadlineAlert.objects.filter(task=late).count(), 2)
+
+    def test_upcoming_then_overdue(self):
+        """Test that a task alerted as due soon is alerted again once it is overdue"""
+        task = self.task('Soon', self.alice, 1)
+        send_deadline_digests()
+        send_deadline_digests(now=timezone.now() + timedelta(days=2))
+        self.assertEqual(
+            sorted(DeadlineAlert.objects.filter(task=task).values_list('kind', flat=True)), ['overdue', 'upcoming']
+        )
+
+    def test_unassigned_tasks_skipped(self):
+        """Test that tasks without an assignee do not break the run"""
+        task = self.task('Orphan', self.alice, -1)
+        Task.objects.filter(pk=task.pk).update(assignee=None)
+        self.assertEqual(send_deadline_digests(), {'alerts': 0, 'digests': 0, 'skipped': 0})
+        self.assertEqual(send_deadline_alerts(), {'shards': []})
+        self.assertFalse(TaskReminder.objects.exists())
+
+    def test_constant_queries(self):
+        """Test that a run costs the same number of queries for 2 or 40 alerts"""
+        counts = []
+        for size in (2, 40):
+            for i in range(size):
+                self.task(f'Task {size}-{i}', self.alice if i % 2 else self.bob, -1)
+            with CaptureQueriesContext(connection) as queries:
+                result = send_deadline_digests()
+            self.assertEqual(result['alerts'], size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_chunks_keep_digests_whole(self):
+        """Test that chunking never splits one assignee's digest"""
+        for i in range(5):
+            self.task(f'Alice {i}', self.alice, -1)
+            self.task(f'Bob {i}', self.bob, -1)
+        counts = send_deadline_digests(chunk_size=3)
+        self.assertEqual(counts, {'alerts': 10, 'digests': 2, 'skipped': 0})
+
+    def test_plan_shards_cover_assignees(self):
+        """Test that shards are disjoint assignee ranges covering every assignee with due tasks"""
+        users = [
+            CustomUser.objects.create_user(username=f'shard{i}', email=f'shard{i}@example.com', password='x', phone_number=f'71{i}')
+            for i in range(10)
+        ]
+        for user in users:
+            self.task(f'Task {user.pk}', user, -1)
+        shards = plan_shards(timezone.now(), shards=4)
+        self.assertLessEqual(len(shards), 4)
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            self.assertEqual(end, start)
+        self.assertEqual(shards[0][0], users[0].pk)
+        self.assertEqual(shards[-1][1], users[-1].pk + 1)
+        self.assertEqual(plan_shards(timezone.now() - timedelta(days=30)), [])
+
+    def test_sharded_run_sends_each_digest_once(self):
+        """Test that the chord of shards sends one digest per assignee and reports per-shard counts"""
+        users = [
+            CustomUser.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='x', phone_number=f'72{i}')
+            for i in range(6)
+        ]
+        for user in users:
+            self.task(f'Late {user.pk}', user, -1)
+            self.task(f'Soon {user.pk}', user, 1)
+        # Run the chord in-process, as a worker would
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+        summarize = mock.patch('projectmanagement.tasks.summarize_deadline_alerts.run', wraps=summarize_deadline_alerts.run)
+        with self.settings(DEADLINE_ALERT_SHARDS=3), summarize as summary:
+            result = send_deadline_alerts()
+        self.assertEqual(len(result['shards']), 3)
+        self.assertEqual(OutboundEmail.objects.count(), 6)
+        self.assertEqual(DeadlineAlert.objects.count(), 12)
+
+        totals = summary.call_args.args[0]
+        self.assertEqual(len(totals), 3)
+        self.assertEqual(sum(shard['alerts'] for shard in totals), 12)
+        self.assertTrue(all('seconds' in shard for shard in totals))
+
+    def test_summary_aggregates_shards(self):
+        """Test that the chord callback totals the shard results"""
+        results = [
+            {'alerts': 3, 'digests': 1, 'skipped': 0, 'shard': [1, 5], 'seconds': 0.2},
+            {'alerts': 4, 'digests': 2, 'skipped': 1, 'shard': [5, 9], 'seconds': 0.5},
+        ]
+        summary = summarize_deadline_alerts(results)
+        self.assertEqual((summary['alerts'], summary['digests'], summary['skipped']), (7, 3, 1))
+        self.assertEqual(summary['seconds'], 0.5)
+        self.assertEqual(summary['shards'], results)
+
+
+class TaskReminderTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user = CustomUser.objects.create_user(
+            username='reminded', email='reminded@example.com', password='x', phone_number='7301'
+        )
+        self.project = Project.objects.create(
+            name='Reminders', description='Reminders', start_date=self.today, end_date=self.today + timedelta(days=30)
+        )
+        self.client = APIClient()
+
+    def reminders(self, task):
+        return dict(TaskReminder.objects.filter(task=task).values_list('kind', 'due_date'))
+
+    def test_created_task_gets_reminders(self):
+        """Test that creating a task through the API schedules its upcoming and overdue reminders"""
+        due = self.today + timedelta(days=5)
+        response = self.client.post('/api/project-management/tasks/', {
+            'project': self.project.pk, 'title': 'New', 'description': 'New', 'assignee': self.user.pk,
+            'priority': 'Low', 'due_date': due.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        reminder = TaskReminder.objects.get(task_id=response.data['id'], kind='upcoming')
+        self.assertEqual(reminder.remind_at.date(), due - timedelta(days=1))
+        self.assertEqual(self.reminders(response.data['id']), {'upcoming': due, 'overdue': due})
+
+    def test_changes_reschedule_reminders(self):
+        """Test that moving the due date reschedules reminders and completing the task cancels them"""
+        task = Task.objects.create(
+            project=self.project, title='Move', description='Move', assignee=self.user,
+            priority='Low', due_date=self.today + timedelta(days=5)
+        )
+        later = self.today + timedelta(days=9)
+        self.client.patch(f'/api/project-management/tasks/{task.pk}/', {'due_date': later.isoformat()}, format='json')
+        self.assertEqual(self.reminders(task), {'upcoming': later, 'overdue': later})
+        self.client.patch(f'/api/project-management/tasks/{task.pk}/', {'status': 'Completed'}, format='json')
+        self.assertEqual(self.reminders(task), {})
+
+    def test_unrelated_edits_keep_reminders(self):
+        """Test that a title-only PATCH leaves the task's reminder rows alone"""
+        task = Task.objects.create(
+            project=self.project, title='Keep', description='Keep', assignee=self.user,
+            priority='Low', due_date=self.today + timedelta(days=5)
+        )
+        before = set(TaskReminder.objects.filter(task=task).values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(f'/api/project-management/tasks/{task.pk}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(TaskReminder.objects.filter(task=task).values_list('pk', flat=True)), before)
+        self.assertFalse([q for q in ctx.captured_queries if 'taskreminder' in q['sql']])
+
+    def test_stale_reminders_ignored(self):
+        """Test that reminders left behind by writes that skip signals are dropped without an alert"""
+        task = Task.objects.create(
+            project=self.project, title='Stale', description='Stale', assignee=self.user,
+            priority='Low', due_date=self.today - timedelta(days=1)
+        )
+        Task.objects.filter(pk=task.pk).update(status='Completed')
+        self.assertEqual(send_deadline_digests(), {'alerts': 0, 'digests': 0, 'skipped': 0})
+        self.assertFalse(TaskReminder.objects.exists())
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_bulk_writes_schedule_reminders(self):
+        """Test that bulk task writes and status transitions keep reminders in step"""
+        due = self.today + timedelta(days=3)
+        response = self.client.post('/api/project-management/tasks/bulk/', {'tasks': [{
+            'project': self.project.pk, 'title': 'Bulk', 'description': 'Bulk', 'assignee': self.user.pk,
+            'priority': 'Low', 'due_date': due.isoformat()
+        }]}, format='json')
+        task_id = response.data['results'][0]['id']
+        self.assertEqual(self.reminders(task_id), {'upcoming': due, 'overdue': due})
+        transition_tasks([(task_id, 'Completed')])
+        self.assertEqual(self.reminders(task_id), {})
+        transition_tasks([(task_id, 'In Progress')])
+        self.assertEqual(self.reminders(task_id), {'upcoming': due, 'overdue': due})
+
+    def test_poll_cost_follows_due_reminders(self):
+        """Test that tasks far from their deadline add nothing to a poll"""
+        Task.objects.create(
+            project=self.project, title='Due', description='Due', assignee=self.user,
+            priority='Low', due_date=self.today - timedelta(days=1)
+        )
+        with CaptureQueriesContext(connection) as before:
+            self.assertEqual(send_deadline_digests()['alerts'], 1)
+        for i in range(30):
+            Task.objects.create(
+                project=self.project, title=f'Far {i}', description='Far', assignee=self.user,
+                priority='Low', due_date=self.today + timedelta(days=60)
+            )
+        with CaptureQueriesContext(connection) as after:
+            self.assertEqual(send_deadline_digests()['alerts'], 0)
+        self.assertLessEqual(len(after), len(before))
+        # The poll reads reminders by remind_at and only joins tasks, never scanning them
+        selects = [query['sql'] for query in after if query['sql'].startswith('SELECT')]
+        self.assertTrue(all('FROM "projectmanagement_taskreminder"' in sql for sql in selects))
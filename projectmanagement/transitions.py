@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .deadline_alerts import schedule_reminders
+from .dependency_graph import COMPLETED
+from .models import Task
+
+
+def transition_tasks(transitions):
+    """
+    Move many tasks to new statuses at once. ``transitions`` is a list of
+    ``(task id, status)`` pairs; a later pair for the same task wins.
+
+    Like ``Task.clean``, a task can only be saved while its dependency is
+    completed, counting completions made by the same batch. Current
+    statuses and dependencies come from one locking query, violating rows
+    are rejected and the rest are written with one UPDATE per target status.
+    Returns a result per task: ``updated``, ``not_found`` or ``blocked``.
+    """
+    targets = dict(transitions)
+    with transaction.atomic():
+        rows = (
+            Task.objects.select_for_update(of=('self',))
+            .filter(id__in=targets)
+            .values_list('id', 'dependency_id', 'dependency__status')
+        )
+        dependency_of = {}
+        dependency_status = {}
+        for task_id, dependency_id, status in rows:
+            dependency_of[task_id] = dependency_id
+            dependency_status[task_id] = status
+
+        accepted = set(dependency_of)
+        # Rejecting a task can block tasks that relied on it being completed, so repeat until stable
+        changed = True
+        while changed:
+            changed = False
+            for task_id in list(accepted):
+                dependency_id = dependency_of[task_id]
+                if dependency_id is None:
+                    continue
+                if dependency_id in accepted:
+                    final_status = targets[dependency_id]
+                else:
+                    final_status = dependency_status[task_id]
+                if final_status != COMPLETED:
+                    accepted.discard(task_id)
+                    changed = True
+
+        by_status = defaultdict(list)
+        for task_id in accepted:
+            by_status[targets[task_id]].append(task_id)
+        for status, ids in by_status.items():
+            Task.objects.filter(id__in=ids).update(status=status)
+        # Completed tasks lose their reminders, reopened ones get them back
+        schedule_reminders(accepted)
+
+    results = []
+    for task_id in targets:
+        if task_id not in dependency_of:
+            results.append({'id': task_id, 'status': 'not_found'})
+        elif task_id in accepted:
+            results.append({'id': task_id, 'status': 'updated'})
+        else:
+            results.append({'id': task_id, 'status': 'blocked', 'dependency': dependency_of[task_id]})
+    return results
@@ -1,10 +1,13 @@
 from django.urls import path
-from .views import ProjectView, MilestoneView, TaskView,ScheduleView
+from .views import ProjectView, ProjectMembersView, MilestoneView, TaskView,ScheduleView, BulkTaskView, TaskStatusView
 
 urlpatterns = [
     path('projects/', ProjectView.as_view(), name='projects'),
+    path('projects/<int:pk>/members/', ProjectMembersView.as_view(), name='project_members'),
     path('milestones/', MilestoneView.as_view(), name='milestones'),
     path('tasks/', TaskView.as_view(), name='tasks'),
+    path('tasks/bulk/', BulkTaskView.as_view(), name='bulk_tasks'),
+    path('tasks/status/', TaskStatusView.as_view(), name='task_status'),
     path('tasks/<int:pk>/', TaskView.as_view(), name='update_task'),
     path('schedule/', ScheduleView.as_view(), name='schedule'),
 ]
\ No newline at end of file
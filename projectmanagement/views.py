@@ -1,17 +1,28 @@
+from itertools import islice
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from .models import Project, ProjectTeamMember, Milestone, Task
+from .bulk_tasks import BulkTaskSerializer, TaskBatch
+from .membership import MembershipError, apply_membership_changes
+from .scheduling import get_schedule_analysis
 from .serializers import ProjectSerializer, ProjectTeamMemberSerializer, MilestoneSerializer, TaskSerializer,ScheduleSerializer
-from django.core.mail import send_mail
+from .serializers import BulkTaskTransitionSerializer, TaskListQuerySerializer, TeamMembershipSerializer, encode_cursor
+from .transitions import transition_tasks
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Q
+from notifications.outbox import queue_mail
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from authflow.models import CustomUser  # Import CustomUser model
 
 class ProjectView(APIView):
     @swagger_auto_schema(responses={200: ProjectSerializer(many=True)})
     def get(self, request):
-        projects = Project.objects.all()
+        projects = Project.objects.prefetch_related('team_members')
         serializer = ProjectSerializer(projects, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -46,22 +57,53 @@ class ProjectView(APIView):
             return Response({'error': 'Project ID and team members are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            project = Project.objects.get(id=project_id)
+            project = Project.objects.prefetch_related('team_members').get(id=project_id)
         except Project.DoesNotExist:
             return Response({'error': 'Project not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Validate team members
-        valid_team_members = CustomUser.objects.filter(id__in=team_members)
-        if len(valid_team_members) != len(team_members):
-            return Response({'error': 'One or more team members are invalid.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Members are resolved with one query; unknown ids are reported together
+        serializer = ProjectSerializer(project, data={'team_members': team_members}, partial=True)
+        if not serializer.is_valid():
+            return Response({'error': 'One or more team members are invalid.', **serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-        # Update team members
-        project.team_members.set(valid_team_members)
-        project.save()
+class ProjectMembersView(APIView):
+    """
+    List a project's team with roles, or change it with ``add``, ``remove``
+    and ``update`` lists. Changes are diffed against the current members and
+    applied together; nothing is written if any of them is invalid.
+    """
+
+    @swagger_auto_schema(responses={200: ProjectTeamMemberSerializer(many=True)})
+    def get(self, request, pk):
+        if not Project.objects.filter(pk=pk).exists():
+            return Response({'error': 'Project not found.'}, status=status.HTTP_404_NOT_FOUND)
+        members = ProjectTeamMember.objects.filter(project_id=pk).order_by('user_id')
+        return Response(ProjectTeamMemberSerializer(members, many=True).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(request_body=TeamMembershipSerializer)
+    def patch(self, request, pk):
+        try:
+            project = Project.objects.only('id').get(pk=pk)
+        except Project.DoesNotExist:
+            return Response({'error': 'Project not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = TeamMembershipSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        try:
+            result = apply_membership_changes(
+                project,
+                add=[(item['user'], item['role']) for item in data['add']],
+                remove=data['remove'],
+                update=[(item['user'], item['role']) for item in data['update']],
+            )
+        except MembershipError as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
 
-        serializer = ProjectSerializer(project)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
 class MilestoneView(APIView):
     @swagger_auto_schema(request_body=MilestoneSerializer, responses={201: MilestoneSerializer})
     def post(self, request):
@@ -72,28 +114,82 @@ class MilestoneView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class TaskView(APIView):
+    @swagger_auto_schema(query_serializer=TaskListQuerySerializer, responses={200: TaskSerializer(many=True)})
+    def get(self, request, pk=None):
+        # tasks/<pk>/ shares this view for updates only
+        if pk is not None:
+            self.http_method_not_allowed(request)
+
+        query = TaskListQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        tasks = Task.objects.all()
+        for field in ('project', 'assignee', 'status', 'priority'):
+            if field in params:
+                tasks = tasks.filter(**{field: params[field]})
+        if 'due_after' in params:
+            tasks = tasks.filter(due_date__gte=params['due_after'])
+        if 'due_before' in params:
+            tasks = tasks.filter(due_date__lte=params['due_before'])
+
+        # Keyset pagination: continue strictly after the sort key of the previous page's last row
+        ordering = params['ordering']
+        descending = ordering.startswith('-')
+        after = 'lt' if descending else 'gt'
+        if ordering.lstrip('-') == 'id':
+            order_by = [ordering]
+            if 'cursor' in params:
+                tasks = tasks.filter(**{f'id__{after}': params['cursor'][0]})
+        else:
+            order_by = [ordering, '-id' if descending else 'id']
+            if 'cursor' in params:
+                due_date, last_id = params['cursor']
+                tasks = tasks.filter(
+                    Q(**{f'due_date__{after}': due_date}) | Q(due_date=due_date, **{f'id__{after}': last_id})
+                )
+
+        limit = params['limit']
+        page = list(tasks.order_by(*order_by)[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        next_cursor = None
+        if has_more:
+            last = page[-1]
+            key = [last.id] if ordering.lstrip('-') == 'id' else [last.due_date.isoformat(), last.id]
+            next_cursor = encode_cursor(key)
+        return Response({
+            'results': TaskSerializer(page, many=True).data,
+            'next_cursor': next_cursor,
+        }, status=status.HTTP_200_OK)
+
     @swagger_auto_schema(request_body=TaskSerializer, responses={201: TaskSerializer})
     def post(self, request):
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                task = serializer.save()
-                # Validate dependency logic
-                if task.dependency and task.dependency.status != 'Completed':
-                    raise ValueError(
-                        f"Task '{task.title}' cannot start until its dependency '{task.dependency.title}' is completed."
-                    )
-                # Send email notification to the assignee
-                if task.assignee:
-                    send_mail(
-                        'New Task Assigned',
-                        f"You have been assigned a new task: {task.title}",
-                        'noreply@example.com',
-                        [task.assignee.email]
-                    )
+                with transaction.atomic():
+                    task = serializer.save()
+                    # Validate dependency logic
+                    if task.dependency and task.dependency.status != 'Completed':
+                        raise ValueError(
+                            f"Task '{task.title}' cannot start until its dependency '{task.dependency.title}' is completed."
+                        )
+                    # Queue email notification to the assignee
+                    if task.assignee:
+                        queue_mail(
+                            'New Task Assigned',
+                            f"You have been assigned a new task: {task.title}",
+                            'noreply@example.com',
+                            [task.assignee.email]
+                        )
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except ValueError as e:
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except ValidationError as e:
+                # Raised by Task.clean, e.g. for a dependency cycle
+                return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @swagger_auto_schema(request_body=TaskSerializer, responses={200: TaskSerializer})
@@ -115,11 +211,102 @@ class TaskView(APIView):
                 return Response(serializer.data, status=status.HTTP_200_OK)
             except ValueError as e:
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except ValidationError as e:
+                # Raised by Task.clean, e.g. for a dependency cycle
+                return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class BulkTaskView(APIView):
+    """
+    Create and update many tasks in one transaction. Items without ``id``
+    are created and may carry a ``temp_id`` that later items use as their
+    ``dependency``; nothing is written unless every item is valid.
+    """
+
+    @swagger_auto_schema(request_body=BulkTaskSerializer)
+    def post(self, request):
+        serializer = BulkTaskSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results, errors = TaskBatch(serializer.validated_data['tasks']).apply()
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+class TaskStatusView(APIView):
+    """
+    Move many tasks to new statuses at once, either from explicit
+    ``transitions`` or ``ids`` with one target ``status``. Tasks whose
+    dependency is not completed are reported as blocked; the rest are
+    updated.
+    """
+
+    @swagger_auto_schema(request_body=BulkTaskTransitionSerializer)
+    def post(self, request):
+        serializer = BulkTaskTransitionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        if 'transitions' in data:
+            transitions = [(item['id'], item['status']) for item in data['transitions']]
+        else:
+            transitions = [(task_id, data['status']) for task_id in data['ids']]
+        results = transition_tasks(transitions)
+        updated = sum(1 for result in results if result['status'] == 'updated')
+        return Response({'updated': updated, 'results': results}, status=status.HTTP_200_OK)
+
+def stream_schedule(projects, chunk_size):
+    """
+    Yield the schedule as a JSON array one project at a time. Projects are
+    read ``chunk_size`` at a time with their tasks and milestones prefetched
+    per chunk, so memory is bounded by the chunk, not the portfolio.
+    """
+    renderer = JSONRenderer()
+    rows = projects.iterator(chunk_size=chunk_size)
+    yield b'['
+    separator = b''
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        # One serializer per chunk; its rendered list is spliced into the outer array
+        body = renderer.render(ScheduleSerializer(chunk, many=True).data)
+        yield separator + body[1:-1]
+        separator = b','
+    yield b']'
+
 class ScheduleView(APIView):
-    @swagger_auto_schema(responses={200: ScheduleSerializer(many=True)})
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('analysis', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['critical-path'],
+                              description='Return earliest/latest start, slack and the critical path per project'),
+            openapi.Parameter('project', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Limit to one project'),
+            openapi.Parameter('stream', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                              description='Stream the schedule as it is read instead of building it in memory'),
+        ],
+        responses={200: ScheduleSerializer(many=True)}
+    )
     def get(self, request):
+        analysis = request.query_params.get('analysis')
+        project_id = request.query_params.get('project')
+        if analysis not in (None, 'critical-path'):
+            return Response({'error': 'Unsupported analysis.'}, status=status.HTTP_400_BAD_REQUEST)
+        if project_id is not None and not project_id.isdigit():
+            return Response({'error': 'Invalid project.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if analysis:
+            projects = Project.objects.only('id', 'start_date')
+            if project_id:
+                projects = projects.filter(pk=project_id)
+            return Response([get_schedule_analysis(project) for project in projects], status=status.HTTP_200_OK)
+
         projects = Project.objects.prefetch_related('tasks', 'milestones').all()
+        if project_id:
+            projects = projects.filter(pk=project_id)
+        if request.query_params.get('stream') in ('1', 'true'):
+            return StreamingHttpResponse(
+                stream_schedule(projects.order_by('id'), settings.SCHEDULE_STREAM_CHUNK_SIZE),
+                content_type='application/json'
+            )
         serializer = ScheduleSerializer(projects, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,4 +1,6 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -10,7 +12,17 @@ from .serializers import ResourceSerializer, ResourceAllocationSerializer, Comme
 import os
 from django.core.files.uploadedfile import SimpleUploadedFile
 
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class ResourceManagementTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        # Uploads land in a throwaway MEDIA_ROOT so test runs never leave files in the repo
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
     def setUp(self):
         # Create test roles
         self.pm_role = Role.objects.create(name='Project Manager', description='Project Manager')